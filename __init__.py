@@ -12,10 +12,6 @@ bl_info = {
 
 
 def register():
-
-    from . import script_panel_extension_system
-    script_panel_extension_system.import_extensions()
-
     from . import script_panel
     script_panel.register()
 
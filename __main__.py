@@ -0,0 +1,5 @@
+import sys
+
+from . import script_panel_cli
+
+sys.exit(script_panel_cli.main())
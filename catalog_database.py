@@ -0,0 +1,215 @@
+"""
+Optional SQLite copy of the catalog, kept in the local config folder.
+
+The catalog is still built from the filesystem. After each refresh only the folders whose sync key changed
+get their rows compared, and only the rows that differ get written. This runs on a background thread, see
+ScriptHandler.start_database_sync(). Label search and folder listing are then answered by sqlite instead
+of looping over every script in python.
+"""
+import os
+import threading
+
+
+class Constants:
+    database_name = "script_catalog.sqlite"
+
+    # stored as PRAGMA user_version, databases written by an older layout are rebuilt from scratch
+    schema_version = 2
+
+    # rows written per transaction while syncing, so edits from the main thread never wait long for the lock
+    sync_batch_size = 2000
+
+    # the trigram index only helps for tokens at least this long
+    min_indexed_token_length = 3
+
+k = Constants
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scripts (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    config_key TEXT NOT NULL,
+    relative_dir TEXT NOT NULL,
+    label_lower TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scripts_relative_dir ON scripts(relative_dir);
+
+CREATE TABLE IF NOT EXISTS dirs (
+    relative_dir TEXT PRIMARY KEY,
+    sync_key TEXT
+);
+"""
+
+# substring search on labels, needs an sqlite built with fts5 (3.34+ for the trigram tokenizer)
+LABEL_INDEX_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS labels USING fts5(label_lower, content='scripts', content_rowid='id', tokenize='trigram');
+
+CREATE TRIGGER IF NOT EXISTS scripts_insert AFTER INSERT ON scripts BEGIN
+    INSERT INTO labels(rowid, label_lower) VALUES (new.id, new.label_lower);
+END;
+
+CREATE TRIGGER IF NOT EXISTS scripts_delete AFTER DELETE ON scripts BEGIN
+    INSERT INTO labels(labels, rowid, label_lower) VALUES ('delete', old.id, old.label_lower);
+END;
+
+CREATE TRIGGER IF NOT EXISTS scripts_update AFTER UPDATE OF label_lower ON scripts BEGIN
+    INSERT INTO labels(labels, rowid, label_lower) VALUES ('delete', old.id, old.label_lower);
+    INSERT INTO labels(rowid, label_lower) VALUES (new.id, new.label_lower);
+END;
+"""
+
+OLD_TABLES = ("labels", "scripts", "dirs", "favorites", "usage")
+
+UPSERT_SCRIPT = (
+    "INSERT INTO scripts (path, config_key, relative_dir, label_lower) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(path) DO UPDATE SET config_key = excluded.config_key, relative_dir = excluded.relative_dir, label_lower = excluded.label_lower"
+    )
+
+
+def get_database_path(config_dir):
+    return os.path.join(config_dir, k.database_name)
+
+
+class CatalogDatabase():
+    def __init__(self, database_path):
+        import sqlite3
+
+        self.database_path = database_path
+        os.makedirs(os.path.dirname(database_path), exist_ok=True)
+
+        # used from the sync thread as well as the main thread
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(database_path, check_same_thread=False)
+
+        # syncs commit in batches, with WAL that doesn't mean a flush to disk every time
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+
+        if self._connection.execute("PRAGMA user_version").fetchone()[0] != k.schema_version:
+            with self._connection:
+                for table_name in OLD_TABLES:
+                    self._connection.execute(f"DROP TABLE IF EXISTS {table_name}")
+            self._connection.execute(f"PRAGMA user_version = {k.schema_version}")
+        self._connection.executescript(SCHEMA)
+
+        try:
+            self._connection.executescript(LABEL_INDEX_SCHEMA)
+            self.has_label_index = True
+        except sqlite3.OperationalError:
+            self.has_label_index = False
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def sync_catalog(self, scripts_by_dir, dir_sync_keys):
+        """
+        dir_sync_keys is {relative dir: key that changes whenever the scripts of the folder can have changed}.
+        Folders with the same key as last time are skipped, a key of None means there's no way to tell so
+        that folder is always compared. Returns the number of rows written.
+        """
+        with self._lock:
+            stored_sync_keys = dict(self._connection.execute("SELECT relative_dir, sync_key FROM dirs"))
+
+        removed_dirs = [relative_dir for relative_dir in stored_sync_keys if relative_dir not in dir_sync_keys]
+        changed_dirs = [
+            relative_dir for relative_dir, sync_key in dir_sync_keys.items()
+            if sync_key is None or relative_dir not in stored_sync_keys or stored_sync_keys[relative_dir] != sync_key
+            ]
+
+        written_count = 0
+        batch_dirs = []
+        batch_size = 0
+        for relative_dir in changed_dirs:
+            batch_dirs.append(relative_dir)
+            batch_size += len(scripts_by_dir.get(relative_dir, ()))
+            if batch_size >= k.sync_batch_size:
+                written_count += self._sync_dirs(batch_dirs, scripts_by_dir, dir_sync_keys)
+                batch_dirs = []
+                batch_size = 0
+        written_count += self._sync_dirs(batch_dirs, scripts_by_dir, dir_sync_keys)
+
+        if removed_dirs:
+            with self._lock, self._connection:
+                self._connection.executemany("DELETE FROM scripts WHERE relative_dir = ?", [(relative_dir,) for relative_dir in removed_dirs])
+                self._connection.executemany("DELETE FROM dirs WHERE relative_dir = ?", [(relative_dir,) for relative_dir in removed_dirs])
+
+        return written_count
+
+    def _sync_dirs(self, relative_dirs, scripts_by_dir, dir_sync_keys):
+        if not relative_dirs:
+            return 0
+
+        new_rows = {}
+        for relative_dir in relative_dirs:
+            for script in scripts_by_dir.get(relative_dir, ()):
+                row = get_script_row(script)
+                new_rows[row[0]] = row
+
+        with self._lock, self._connection:
+            existing_rows = {}
+            for relative_dir in relative_dirs:
+                for row in self._connection.execute(
+                        "SELECT path, config_key, relative_dir, label_lower FROM scripts WHERE relative_dir = ?", (relative_dir,)):
+                    existing_rows[row[0]] = row
+
+            changed_rows = [row for path, row in new_rows.items() if existing_rows.get(path) != row]
+            removed_paths = [(path,) for path in existing_rows if path not in new_rows]
+
+            self._connection.executemany("DELETE FROM scripts WHERE path = ?", removed_paths)
+            self._connection.executemany(UPSERT_SCRIPT, changed_rows)
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO dirs VALUES (?, ?)",
+                [(relative_dir, dir_sync_keys[relative_dir]) for relative_dir in relative_dirs],
+                )
+
+        return len(changed_rows)
+
+    def update_scripts(self, scripts):
+        """One transaction for all of them, e.g. every script a config shard changed"""
+        with self._lock, self._connection:
+            self._connection.executemany(UPSERT_SCRIPT, [get_script_row(script) for script in scripts])
+
+    def search_labels(self, filter_tokens):
+        """Paths of scripts whose label contains every token"""
+        indexed_tokens = []
+        if self.has_label_index:
+            indexed_tokens = [token for token in filter_tokens if len(token) >= k.min_indexed_token_length]
+        other_tokens = [token for token in filter_tokens if token and token not in indexed_tokens]
+
+        conditions = ["instr(scripts.label_lower, ?) > 0" for _ in other_tokens]
+        parameters = list(other_tokens)
+        if indexed_tokens:
+            query = "SELECT scripts.path FROM labels JOIN scripts ON scripts.id = labels.rowid"
+            conditions.insert(0, "labels MATCH ?")
+
+            # each token as a quoted phrase, which the trigram tokenizer matches as a substring
+            parameters.insert(0, " ".join('"{}"'.format(token.replace('"', '""')) for token in indexed_tokens))
+        else:
+            query = "SELECT scripts.path FROM scripts"
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY scripts.path"
+
+        with self._lock:
+            return [row[0] for row in self._connection.execute(query, parameters)]
+
+    def get_dir_script_paths(self, relative_dirs):
+        relative_dirs = list(relative_dirs)
+        placeholders = ", ".join("?" for _ in relative_dirs)
+        with self._lock:
+            return [row[0] for row in self._connection.execute(
+                f"SELECT path FROM scripts WHERE relative_dir IN ({placeholders}) ORDER BY path",
+                relative_dirs,
+                )]
+
+
+def get_script_row(script):
+    return (
+        script.path,
+        script.get_config_key(),
+        script.relative_dir,
+        script.lower_label,
+        )
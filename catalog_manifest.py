@@ -0,0 +1,178 @@
+"""
+Catalog manifest that a studio can publish next to shared_config.json.
+
+It holds the file listing of every folder under scripts/ together with the folder mtimes, the
+resolved shared config and the icons it refers to. When scanning, a folder whose mtime still
+matches the manifest is taken from the manifest instead of being listed again, so only folders
+that changed since the publish hit the (network) filesystem.
+"""
+import os
+import json
+
+from . import file_utils
+from . import config_journal
+from . import scan_ignore
+from . import script_panel_logger
+from . import script_panel_metrics
+
+log = script_panel_logger.get_logger()
+
+
+class Constants:
+    manifest_name = "catalog_manifest.json"
+    version = 1
+
+k = Constants
+
+
+def get_manifest_path(root_dir):
+    return os.path.join(root_dir, k.manifest_name)
+
+
+def load_manifest(root_dir):
+    manifest_path = get_manifest_path(root_dir)
+    if not os.path.exists(manifest_path):
+        return None
+
+    try:
+        with open(manifest_path, "r") as fp:
+            manifest = json.load(fp)
+    except ValueError:
+        log.warning(f"Ignoring broken manifest: {manifest_path}")
+        return None
+
+    if manifest.get("version") != k.version:
+        return None
+
+    return manifest
+
+
+def write_manifest(root_dir):
+    """Publish step, scans the whole root dir and writes the manifest next to the shared config"""
+    scripts_root_path = os.path.join(root_dir, "scripts")
+    shared_config_path = os.path.join(root_dir, "shared_config.json")
+
+    dir_records = {}
+    for _ in walk_scripts_dir(scripts_root_path, dir_records_out=dir_records, ignore_rules=scan_ignore.get_root_rules(root_dir)):
+        pass
+
+    shared_config = config_journal.read_config(shared_config_path)
+    icon_paths = set()
+    for script_config in shared_config.get("script_configs", {}).values():
+        if isinstance(script_config, dict) and script_config.get("icon_path"):
+            icon_paths.add(script_config["icon_path"])
+
+    manifest = {
+        "version": k.version,
+        "dirs": dir_records,
+        "shared_config": {
+            "stat": get_config_stat(shared_config_path),
+            "data": shared_config,
+            },
+        "icons": sorted(icon_paths),
+    }
+
+    file_utils.write_json(get_manifest_path(root_dir), manifest)
+
+    return manifest
+
+
+def get_config_stat(config_path):
+    """Changes whenever the config or its journal is written to"""
+    stat_key = []
+    for path in (config_path, config_journal.get_journal_path(config_path)):
+        stat_key.extend(file_utils.get_stat_key(path) or (0, 0))
+    return stat_key
+
+
+def get_shared_config(manifest, shared_config_path):
+    """The resolved shared config from the manifest, or None if the config changed after publishing"""
+    if not manifest:
+        return None
+
+    shared_config = manifest.get("shared_config", {})
+    if shared_config.get("stat") != get_config_stat(shared_config_path):
+        return None
+
+    return shared_config.get("data")
+
+
+def list_dir(dir_path):
+    file_names = []
+    sub_dir_names = []
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                # like os.walk, don't follow symlinked folders
+                if not entry.is_symlink():
+                    sub_dir_names.append(entry.name)
+            else:
+                file_names.append(entry.name)
+    return sorted(file_names), sorted(sub_dir_names)
+
+
+def walk_scripts_dir(scripts_root_path, manifest=None, dir_records_out=None, ignore_rules=None):
+    """
+    Same top-down order as os.walk, yields (parent_dir, relative_dir, file_names).
+    relative_dir uses forward slashes and is "." for the scripts root.
+    Folders matching ignore_rules are skipped without being listed.
+    """
+    manifest_dirs = manifest.get("dirs", {}) if manifest else {}
+
+    pending_dirs = [(".", ignore_rules)]
+    while pending_dirs:
+        relative_dir, dir_ignore_rules = pending_dirs.pop()
+        parent_dir = scripts_root_path if relative_dir == "." else os.path.join(scripts_root_path, relative_dir)
+
+        dir_mtime = file_utils.get_mtime(parent_dir)
+        if dir_mtime is None:
+            continue
+
+        dir_record = manifest_dirs.get(relative_dir)
+        if dir_record and dir_record["mtime"] == dir_mtime:
+            script_panel_metrics.inc("manifest_dir_hits", description="folders taken from the catalog manifest")
+            file_names = dir_record["files"]
+            sub_dir_names = dir_record["dirs"]
+        else:
+            if manifest:
+                script_panel_metrics.inc("manifest_dir_misses", description="folders listed again since they changed after publishing")
+            try:
+                file_names, sub_dir_names = list_dir(parent_dir)
+            except OSError:
+                continue
+
+        if dir_records_out is not None:
+            dir_records_out[relative_dir] = {"mtime": dir_mtime, "files": file_names, "dirs": sub_dir_names}
+
+        if dir_ignore_rules is not None:
+            if scan_ignore.k.file_name in file_names:
+                ignore_file_path = os.path.join(parent_dir, scan_ignore.k.file_name)
+                dir_ignore_rules = dir_ignore_rules.extended(scan_ignore.read_patterns(ignore_file_path), relative_dir)
+            file_names = dir_ignore_rules.filter_files(relative_dir, file_names)
+
+        yield parent_dir, relative_dir, file_names
+
+        for sub_dir_name in reversed(sub_dir_names):
+            sub_relative_dir = sub_dir_name if relative_dir == "." else f"{relative_dir}/{sub_dir_name}"
+            if dir_ignore_rules is not None and dir_ignore_rules.is_ignored(sub_relative_dir, is_dir=True):
+                continue
+            pending_dirs.append((sub_relative_dir, dir_ignore_rules))
+
+
+def get_stale_dirs(root_dir, manifest):
+    """Folders that changed on disk since the manifest was published"""
+    manifest_dirs = manifest.get("dirs", {}) if manifest else {}
+    scripts_root_path = os.path.join(root_dir, "scripts")
+
+    current_dirs = {}
+    for _ in walk_scripts_dir(scripts_root_path, dir_records_out=current_dirs, ignore_rules=scan_ignore.get_root_rules(root_dir)):
+        pass
+
+    stale_dirs = []
+    for relative_dir, dir_record in current_dirs.items():
+        manifest_record = manifest_dirs.get(relative_dir)
+        if not manifest_record or manifest_record["mtime"] != dir_record["mtime"]:
+            stale_dirs.append(relative_dir)
+
+    stale_dirs.extend(relative_dir for relative_dir in manifest_dirs if relative_dir not in current_dirs)
+    return sorted(stale_dirs)
@@ -0,0 +1,206 @@
+"""
+Append-only change log for config files that several people write to at the same time.
+
+Instead of rewriting the whole config json for every edit, each change is appended as a single
+json line to a journal next to the config, under an advisory lock. Once the journal grows past
+a threshold it gets folded back into the snapshot.
+
+Readers apply the snapshot and then only the part of the journal they haven't seen yet.
+"""
+import os
+import copy
+import json
+import threading
+from contextlib import contextmanager
+
+from . import file_utils
+from . import script_panel_metrics
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class Constants:
+    journal_suffix = ".journal"
+    lock_suffix = ".lock"
+
+    # compact the journal into the snapshot once it's bigger than this (in bytes)
+    compact_threshold = 64 * 1024
+
+k = Constants
+
+
+def get_journal_path(config_path):
+    return config_path + k.journal_suffix
+
+
+def get_lock_path(config_path):
+    return config_path + k.lock_suffix
+
+
+@contextmanager
+def locked(config_path):
+    """Exclusive advisory lock shared by every process writing to this config"""
+    lock_path = get_lock_path(config_path)
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+
+    with open(lock_path, "a+b") as fp:
+        _acquire_lock(fp)
+        try:
+            yield
+        finally:
+            _release_lock(fp)
+
+
+def _acquire_lock(fp):
+    if os.name == "nt":
+        fp.seek(0)
+        while True:
+            try:
+                # LK_LOCK gives up after 10 seconds, keep trying until we get it
+                msvcrt.locking(fp.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+    else:
+        fcntl.flock(fp.fileno(), fcntl.LOCK_EX)
+
+
+def _release_lock(fp):
+    if os.name == "nt":
+        fp.seek(0)
+        msvcrt.locking(fp.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fp.fileno(), fcntl.LOCK_UN)
+
+
+def append_change(config_path, section, key, value):
+    """
+    Record that config_data[section][key] is now value.
+    A value of None removes the key from the section.
+    """
+    record = json.dumps({"section": section, "key": key, "value": value}, separators=(",", ":"))
+
+    with locked(config_path):
+        with open(get_journal_path(config_path), "a", encoding="utf-8") as fp:
+            fp.write(record + "\n")
+            fp.flush()
+            os.fsync(fp.fileno())
+            journal_size = fp.tell()
+
+        if journal_size > k.compact_threshold:
+            _compact_locked(config_path)
+
+
+def compact(config_path):
+    """Fold the journal into the snapshot file"""
+    with locked(config_path):
+        _compact_locked(config_path)
+
+
+def _compact_locked(config_path):
+    journal_path = get_journal_path(config_path)
+
+    config_data = read_json(config_path)
+    if os.path.exists(journal_path):
+        with open(journal_path, "rb") as fp:
+            apply_journal_bytes(config_data, fp.read())
+
+    write_config_locked(config_path, config_data)
+
+
+def write_config_locked(config_path, config_data):
+    """Replace the snapshot and empty the journal, the caller has to hold locked(config_path)"""
+    journal_path = get_journal_path(config_path)
+    os.makedirs(os.path.dirname(config_path), exist_ok=True)
+
+    # replace the snapshot atomically so readers never see a half written file
+    file_utils.write_json(config_path, config_data, indent=2, fsync=True)
+
+    # records are absolute values, so a reader that applies them again on top of the new snapshot is fine
+    with open(journal_path, "w"):
+        pass
+
+
+def apply_journal_bytes(config_data, journal_bytes):
+    """Apply all complete lines, returns how many bytes were consumed"""
+    end = journal_bytes.rfind(b"\n") + 1
+
+    for line in journal_bytes[:end].splitlines():
+        if not line.strip():
+            continue
+
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+
+        section = config_data.setdefault(record["section"], {})
+        if record["value"] is None:
+            section.pop(record["key"], None)
+        else:
+            section[record["key"]] = record["value"]
+
+    return end
+
+
+def read_json(config_path):
+    if not os.path.exists(config_path):
+        return {}
+
+    with open(config_path, "r") as fp:
+        return json.load(fp)
+
+
+class _CachedConfig():
+    def __init__(self):
+        self.snapshot_stat = None
+        self.journal_offset = 0
+        self.data = {}
+
+
+_cache = {}
+
+# read_config is called from the refresh thread and the main thread, the cached data is updated in place
+_cache_lock = threading.Lock()
+
+
+def read_config(config_path):
+    """Get the config data with all journaled changes applied"""
+    with _cache_lock:
+        cached = _get_cached_config(config_path)
+
+        # callers are free to modify what they get back
+        return copy.deepcopy(cached.data)
+
+
+def _get_cached_config(config_path):
+    """The caller has to hold _cache_lock"""
+    cached = _cache.get(config_path)
+
+    snapshot_stat = file_utils.get_stat_key(config_path, include_inode=True)
+    if cached is None or cached.snapshot_stat != snapshot_stat:
+        script_panel_metrics.inc("config_cache_misses", description="config snapshots parsed from disk")
+        cached = _CachedConfig()
+        cached.snapshot_stat = snapshot_stat
+        cached.data = read_json(config_path)
+        _cache[config_path] = cached
+    else:
+        script_panel_metrics.inc("config_cache_hits", description="config snapshots reused from memory")
+
+    journal_path = get_journal_path(config_path)
+    journal_size = os.path.getsize(journal_path) if os.path.exists(journal_path) else 0
+
+    if journal_size < cached.journal_offset:
+        # journal was compacted since we last looked at it, start over
+        _cache.pop(config_path)
+        return _get_cached_config(config_path)
+
+    if journal_size > cached.journal_offset:
+        with open(journal_path, "rb") as fp:
+            fp.seek(cached.journal_offset)
+            cached.journal_offset += apply_journal_bytes(cached.data, fp.read())
+
+    return cached
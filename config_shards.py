@@ -0,0 +1,83 @@
+"""
+Per-folder shards of the shared script configs.
+
+Once a root is sharded, the script_configs of shared_config.json live in one small config per folder
+under shared_config_shards/, mirroring the scripts/ tree. A shard is only read once its folder is shown
+or searched, and editing a button only appends to the journal of that one shard.
+
+Config keys don't change, so anything left in shared_config.json still applies. Shard entries win.
+"""
+import os
+
+from . import config_journal
+
+
+class Constants:
+    shards_dir_name = "shared_config_shards"
+    shard_file_name = "script_configs.json"
+
+    # set in shared_config.json once the root has been migrated
+    sharded_flag = "sharded_script_configs"
+
+    script_configs = "script_configs"
+
+k = Constants
+
+
+def is_sharded(shared_config):
+    return bool(shared_config.get(k.sharded_flag))
+
+
+def get_shards_dir(root_dir):
+    return os.path.join(root_dir, k.shards_dir_name)
+
+
+def get_shard_path(root_dir, config_key):
+    """Shard holding the config of the script with this config key"""
+    return get_dir_shard_path(root_dir, os.path.dirname(config_key))
+
+
+def get_dir_shard_path(root_dir, relative_dir):
+    """relative_dir is relative to the root dir, e.g. scripts/modeling"""
+    return os.path.join(get_shards_dir(root_dir), relative_dir, k.shard_file_name)
+
+
+def read_shard(shard_path):
+    """{config key: script config}, journaled changes included"""
+    return config_journal.read_config(shard_path).get(k.script_configs, {})
+
+
+def iter_shard_paths(root_dir):
+    for parent_dir, _, file_names in os.walk(get_shards_dir(root_dir)):
+        if k.shard_file_name in file_names:
+            yield os.path.join(parent_dir, k.shard_file_name)
+
+
+def migrate_root(root_dir):
+    """
+    Move the script configs of shared_config.json into per-folder shards.
+    Safe to run again, entries that already exist in a shard are left alone. Returns the number of shards written.
+    """
+    shared_config_path = os.path.join(root_dir, "shared_config.json")
+
+    with config_journal.locked(shared_config_path):
+        shared_config = config_journal.read_config(shared_config_path)
+
+        configs_by_shard = {}
+        for config_key, script_config in shared_config.get(k.script_configs, {}).items():
+            configs_by_shard.setdefault(get_shard_path(root_dir, config_key), {})[config_key] = script_config
+
+        for shard_path, script_configs in configs_by_shard.items():
+            with config_journal.locked(shard_path):
+                shard_config = config_journal.read_config(shard_path)
+                shard_script_configs = shard_config.setdefault(k.script_configs, {})
+                for config_key, script_config in script_configs.items():
+                    shard_script_configs.setdefault(config_key, script_config)
+                config_journal.write_config_locked(shard_path, shard_config)
+
+        # the flag goes in last, until then everybody keeps using the monolithic file
+        shared_config.pop(k.script_configs, None)
+        shared_config[k.sharded_flag] = True
+        config_journal.write_config_locked(shared_config_path, shared_config)
+
+    return len(configs_by_shard)
@@ -0,0 +1,68 @@
+"""
+File helpers shared by the caches, manifests and configs.
+
+Everything that gets read by other processes or other blender instances is written with atomic_write(),
+so a reader only ever sees the old or the new file. Stat keys decide whether a cached copy is still valid.
+"""
+import os
+import json
+from contextlib import contextmanager
+
+
+def get_temp_path(path):
+    # one per process, two instances writing the same file never write into the same temp file
+    return f"{path}.{os.getpid()}.tmp"
+
+
+@contextmanager
+def atomic_write(path, mode="w", fsync=False):
+    """Write into a temp file next to path, which replaces path once the block finished without an error"""
+    temp_path = get_temp_path(path)
+    try:
+        with open(temp_path, mode) as fp:
+            yield fp
+            if fsync:
+                fp.flush()
+                os.fsync(fp.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_json(path, data, indent=None, fsync=False):
+    # compact unless it's a file people read, caches get parsed on every start
+    separators = None if indent else (",", ":")
+    with atomic_write(path, fsync=fsync) as fp:
+        json.dump(data, fp, indent=indent, separators=separators)
+
+
+def write_bytes(path, data):
+    with atomic_write(path, "wb") as fp:
+        fp.write(data)
+
+
+def get_stat_key(path, include_inode=False):
+    """
+    [mtime, size], changes whenever the file gets written to. None when it doesn't exist.
+    A list so it compares equal to the same key read back from a json cache.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    if include_inode:
+        # a file replaced by another one within the mtime resolution still gets a new inode
+        return [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def get_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
@@ -1,13 +1,17 @@
 import os
 import bpy
-from bpy.utils import previews
 
 __icon_manager__ = None
 
+# built on first use, getting every icon name out of the rna is slow enough to notice at startup
+__icon_enum_items__ = []
+
 class IconManager():
     icons = None
 
     def __init__(self):
+        from bpy.utils import previews
+
         self.registered_icons = {}
         self.icons = previews.new()
 
@@ -17,6 +21,8 @@ class IconManager():
         self.registered_icons[icon_path] = icon_name
 
     def unregister(self):
+        from bpy.utils import previews
+
         previews.remove(self.icons)
         self.icons = None
 
@@ -26,6 +32,11 @@ def get_icon_name_from_path(icon_path):
 
 
 def get_icon(icon_path):
+    global __icon_manager__
+    if __icon_manager__ is None:
+        # the preview collection is only created once a button with a custom icon gets drawn
+        __icon_manager__ = IconManager()
+
     if not __icon_manager__.registered_icons.get(icon_path):
         __icon_manager__.register_icon(icon_path)
 
@@ -41,20 +52,16 @@ def get_default_icon_names():
     return bpy.types.UILayout.bl_rna.functions["prop"].parameters["icon"].enum_items.keys()
 
 
-def get_default_icon_enum():
-    enum_items = []
-    for i, icon_name in enumerate(get_default_icon_names()):
-        enum_items.append((icon_name, icon_name, "", icon_name, i))
-    return enum_items
-
-
-def register():
-    global __icon_manager__ 
-    if __icon_manager__ is None:
-        __icon_manager__ = IconManager()
+def get_default_icon_enum(self=None, context=None):
+    """Also works as an EnumProperty items callback, blender needs the returned list to stay referenced"""
+    if not __icon_enum_items__:
+        for i, icon_name in enumerate(get_default_icon_names()):
+            __icon_enum_items__.append((icon_name, icon_name, "", icon_name, i))
+    return __icon_enum_items__
 
 
 def unregister():
     global __icon_manager__
-    __icon_manager__.unregister()
-    __icon_manager__ = None
+    if __icon_manager__ is not None:
+        __icon_manager__.unregister()
+        __icon_manager__ = None
@@ -0,0 +1,282 @@
+"""
+Root dirs served from an HTTP catalog instead of a mounted share.
+
+The server only has to host a root dir as static files, together with the remote manifest written by
+write_remote_manifest(). Each remote root gets synced into a local cache folder that is laid out like
+a regular root dir, and that folder is what the panel scans. When the server can't be reached the
+last synced copy keeps being used.
+
+A sync asks for the manifest with If-None-Match/If-Modified-Since and stops at a 304. Otherwise only
+the files whose hash changed are downloaded, in parallel over connections that are kept open.
+"""
+import os
+import json
+import hashlib
+import threading
+import urllib.parse
+
+from . import file_utils
+from . import config_journal
+from . import config_shards
+from . import catalog_manifest
+from . import scan_ignore
+from . import script_panel_logger
+from . import script_panel_metrics
+
+log = script_panel_logger.get_logger()
+
+
+class Constants:
+    manifest_name = "remote_manifest.json"
+    version = 1
+
+    # kept in the cache folder, what the last sync downloaded
+    state_file_name = ".remote_state.json"
+
+    # under the local config folder, one sub folder per catalog url
+    cache_dir_name = "remote_roots"
+
+    timeout = 10
+    max_workers = 8
+
+k = Constants
+
+
+class RemoteCatalogError(Exception):
+    pass
+
+
+class SyncResult():
+    __slots__ = ("url", "downloaded", "removed", "not_modified", "offline")
+
+    def __init__(self, url):
+        self.url = url
+        self.downloaded = []
+        self.removed = []
+        self.not_modified = False
+
+        # the server couldn't be reached, the cache folder is left as it was
+        self.offline = False
+
+    @property
+    def has_changes(self):
+        return bool(self.downloaded or self.removed)
+
+
+def get_cache_dir(config_dir, url):
+    url_hash = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+    # the folder name shows up as the root name in the panel, so it's taken from the url
+    url_parts = urllib.parse.urlsplit(url)
+    root_name = url_parts.path.rstrip("/").rpartition("/")[2] or url_parts.hostname or "remote"
+    return os.path.join(config_dir, k.cache_dir_name, url_hash, urllib.parse.unquote(root_name))
+
+
+def get_file_hash(file_path):
+    with open(file_path, "rb") as fp:
+        return hashlib.sha1(fp.read()).hexdigest()
+
+
+def iter_root_files(root_dir):
+    """Every file of a root dir that a synced copy needs, as paths relative to the root dir with forward slashes"""
+    shared_config_path = os.path.join(root_dir, "shared_config.json")
+    config_paths = [shared_config_path]
+    config_paths.extend(config_shards.iter_shard_paths(root_dir))
+
+    # journals are served as they are, read_config() applies them on the synced copy
+    for config_path in config_paths:
+        for path in (config_path, config_journal.get_journal_path(config_path)):
+            if os.path.isfile(path):
+                yield os.path.relpath(path, root_dir).replace(os.sep, "/")
+
+    scripts_root_path = os.path.join(root_dir, "scripts")
+    ignore_rules = scan_ignore.get_root_rules(root_dir)
+    for _, relative_dir, file_names in catalog_manifest.walk_scripts_dir(scripts_root_path, ignore_rules=ignore_rules):
+        member_dir = "scripts" if relative_dir == "." else f"scripts/{relative_dir}"
+        for file_name in file_names:
+            yield f"{member_dir}/{file_name}"
+
+
+def write_remote_manifest(root_dir):
+    """Publish step, lists every file to serve with its hash. Returns the manifest."""
+    files = {}
+    for name in iter_root_files(root_dir):
+        file_path = os.path.join(root_dir, *name.split("/"))
+        files[name] = {"sha1": get_file_hash(file_path), "size": os.path.getsize(file_path)}
+
+    manifest = {
+        "version": k.version,
+        "files": files,
+    }
+
+    file_utils.write_json(os.path.join(root_dir, k.manifest_name), manifest)
+
+    return manifest
+
+
+def get_local_path(cache_dir, name):
+    """Where a file from the manifest goes, refuses names that would end up outside of the cache folder"""
+    parts = name.split("/")
+    if not name or name.startswith("/") or ":" in name or any(part in ("", ".", "..") for part in parts):
+        raise RemoteCatalogError(f"Invalid file name in remote manifest: {name}")
+    return os.path.join(cache_dir, *parts)
+
+
+class HttpClient():
+    """GET requests below a base url, each thread keeps its own connection open between requests"""
+    def __init__(self, base_url, timeout=k.timeout):
+        import http.client
+
+        url_parts = urllib.parse.urlsplit(base_url)
+        if url_parts.scheme == "https":
+            self.connection_cls = http.client.HTTPSConnection
+        elif url_parts.scheme == "http":
+            self.connection_cls = http.client.HTTPConnection
+        else:
+            raise RemoteCatalogError(f"Not an http(s) url: {base_url}")
+
+        self.host = url_parts.netloc
+        self.base_path = url_parts.path.rstrip("/") + "/"
+        self.timeout = timeout
+
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def get(self, name, headers=None):
+        """(status, response headers, body)"""
+        connection = self._get_connection()
+        path = self.base_path + urllib.parse.quote(name)
+        try:
+            connection.request("GET", path, headers=headers or {})
+            response = connection.getresponse()
+        except (ConnectionResetError, BrokenPipeError):
+            # the server closed the kept open connection in the meantime, request() reconnects after close()
+            connection.close()
+            connection.request("GET", path, headers=headers or {})
+            response = connection.getresponse()
+
+        return response.status, response.headers, response.read()
+
+    def _get_connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self.connection_cls(self.host, timeout=self.timeout)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def close(self):
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+
+
+def read_state(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, k.state_file_name), "r") as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_state(cache_dir, state):
+    file_utils.write_json(os.path.join(cache_dir, k.state_file_name), state)
+
+
+def download_file(client: HttpClient, cache_dir, name, expected_hash):
+    status, _, body = client.get(name)
+    if status != 200:
+        raise RemoteCatalogError(f"HTTP {status} for {name}")
+
+    if hashlib.sha1(body).hexdigest() != expected_hash:
+        raise RemoteCatalogError(f"{name} doesn't match the hash in the remote manifest")
+
+    local_path = get_local_path(cache_dir, name)
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    file_utils.write_bytes(local_path, body)
+
+
+def sync_remote_root(url, cache_dir, max_workers=k.max_workers):
+    """Bring the cache folder up to date with the catalog at url, never raises for network problems"""
+    # http.client pulls in ssl and email, only paid for once a remote root is actually synced
+    import http.client
+    import concurrent.futures
+
+    result = SyncResult(url)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    state = read_state(cache_dir)
+    if state.get("url") != url:
+        state = {"url": url}
+    synced_files = state.get("files", {})
+
+    client = HttpClient(url)
+    try:
+        headers = {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+
+        status, response_headers, body = client.get(k.manifest_name, headers)
+        if status == 304:
+            result.not_modified = True
+            script_panel_metrics.inc("remote_sync_not_modified", description="remote catalog syncs answered with 304")
+            return result
+        if status != 200:
+            raise RemoteCatalogError(f"HTTP {status} for {k.manifest_name}")
+
+        manifest = json.loads(body)
+        if manifest.get("version") != k.version:
+            raise RemoteCatalogError(f"Unsupported remote manifest version: {manifest.get('version')}")
+
+        remote_files = {name: record["sha1"] for name, record in manifest["files"].items()}
+        changed_names = [
+            name for name, file_hash in remote_files.items()
+            if synced_files.get(name) != file_hash or not os.path.isfile(get_local_path(cache_dir, name))
+        ]
+
+        failed = False
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            futures = {executor.submit(download_file, client, cache_dir, name, remote_files[name]): name for name in changed_names}
+            for future in concurrent.futures.as_completed(futures):
+                name = futures[future]
+                try:
+                    future.result()
+                except (OSError, http.client.HTTPException, RemoteCatalogError) as e:
+                    log.warning(f"Failed to download {name} from {url}: {e}")
+                    failed = True
+                    continue
+                synced_files[name] = remote_files[name]
+                result.downloaded.append(name)
+
+        for name in list(synced_files):
+            if name in remote_files:
+                continue
+            try:
+                os.remove(get_local_path(cache_dir, name))
+            except FileNotFoundError:
+                pass
+            del synced_files[name]
+            result.removed.append(name)
+
+        state["files"] = synced_files
+
+        # without the validators the next sync fetches the manifest again and retries what failed
+        state["etag"] = None if failed else response_headers.get("ETag")
+        state["last_modified"] = None if failed else response_headers.get("Last-Modified")
+        write_state(cache_dir, state)
+
+        script_panel_metrics.inc("remote_files_downloaded", len(result.downloaded), "files downloaded from remote catalogs")
+
+    except (OSError, http.client.HTTPException, ValueError, KeyError, RemoteCatalogError) as e:
+        log.warning(f"Remote catalog {url} unavailable, using the last synced copy: {e}")
+        result.offline = True
+
+    finally:
+        client.close()
+
+    return result
@@ -0,0 +1,153 @@
+"""
+gitignore style rules for skipping files and folders while scanning for scripts.
+
+A .scriptpanelignore next to shared_config.json applies to the whole root, one inside a folder
+under scripts/ applies to that folder and everything below it. Ignored folders are never listed.
+
+Supported syntax: # comments, ! to re-include, a trailing / to only match folders, a leading or
+middle / to anchor the pattern to the folder of the ignore file, and * ? ** [...] wildcards.
+"""
+import os
+import re
+
+from . import file_utils
+
+
+class Constants:
+    file_name = ".scriptpanelignore"
+
+    # things people tend to drop into a scripts folder that never contain panel scripts
+    default_patterns = (
+        "__pycache__/",
+        ".git/",
+        ".svn/",
+        ".venv/",
+        "venv/",
+        "site-packages/",
+        "node_modules/",
+    )
+
+k = Constants
+
+
+class IgnoreRule():
+    __slots__ = ("regex", "negate", "dir_only")
+
+    def __init__(self, regex, negate, dir_only):
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+
+
+def translate_glob(pattern):
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+            continue
+
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif char == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                regex += re.escape(char)
+            else:
+                char_class = pattern[i + 1:end]
+                if char_class.startswith("!"):
+                    char_class = "^" + char_class[1:]
+                regex += f"[{char_class}]"
+                i = end
+        else:
+            regex += re.escape(char)
+        i += 1
+    return regex
+
+
+def compile_pattern(pattern, base_dir="."):
+    """base_dir is the folder of the ignore file, relative to scripts/ with forward slashes"""
+    pattern = pattern.rstrip("\n\r")
+    if not pattern.strip() or pattern.startswith("#"):
+        return None
+
+    negate = pattern.startswith("!")
+    if negate:
+        pattern = pattern[1:]
+
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if not pattern:
+        return None
+
+    # like git, a slash anywhere but the end ties the pattern to the folder of the ignore file
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    base_prefix = "" if base_dir == "." else re.escape(base_dir + "/")
+    any_depth = "" if anchored else "(?:.*/)?"
+
+    regex = re.compile(f"{base_prefix}{any_depth}{translate_glob(pattern)}$")
+    return IgnoreRule(regex, negate, dir_only)
+
+
+class IgnoreRules():
+    """Immutable, so the rules of a parent folder can be shared with all its children"""
+    def __init__(self, rules=()):
+        self.rules = tuple(rules)
+
+        # most rules only apply to folders, don't run them against every file
+        self.file_rules = tuple(rule for rule in self.rules if not rule.dir_only)
+
+    def extended(self, patterns, base_dir="."):
+        new_rules = [compile_pattern(pattern, base_dir) for pattern in patterns]
+        new_rules = [rule for rule in new_rules if rule is not None]
+        if not new_rules:
+            return self
+        return IgnoreRules(self.rules + tuple(new_rules))
+
+    def is_ignored(self, relative_path, is_dir=False):
+        ignored = False
+        for rule in (self.rules if is_dir else self.file_rules):
+            if rule.regex.match(relative_path):
+                ignored = not rule.negate
+        return ignored
+
+    def filter_files(self, relative_dir, file_names):
+        if not self.file_rules:
+            return file_names
+        prefix = "" if relative_dir == "." else relative_dir + "/"
+        return [file_name for file_name in file_names if not self.is_ignored(prefix + file_name)]
+
+
+_file_cache = {}
+
+
+def read_patterns(ignore_file_path):
+    """Cached by mtime, the same ignore files get read on every refresh"""
+    mtime = file_utils.get_mtime(ignore_file_path)
+    if mtime is None:
+        return ()
+
+    cached = _file_cache.get(ignore_file_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(ignore_file_path, "r", encoding="utf-8", errors="replace") as fp:
+        patterns = tuple(fp.readlines())
+    _file_cache[ignore_file_path] = (mtime, patterns)
+    return patterns
+
+
+def get_root_rules(root_dir):
+    """Default rules plus the ignore file of the root dir"""
+    rules = IgnoreRules().extended(k.default_patterns)
+    return rules.extended(read_patterns(os.path.join(root_dir, k.file_name)))
@@ -0,0 +1,180 @@
+"""
+Zip bundles of a root dir, for script libraries that live on a slow network share.
+
+A bundle holds the scripts/ folder and the resolved shared config of a root dir, see pack_root().
+It's read with one sequential read and listed from the zip's central directory, scripts run from
+code objects compiled in memory and helper packages under scripts/ are imported through zipimport.
+
+Bundles are read only. Shared button settings saved from the panel go to <bundle>.shared_config.json
+next to the bundle, which is applied on top of the bundled config.
+"""
+import io
+import os
+import sys
+import json
+import threading
+
+from . import file_utils
+from . import config_journal
+from . import config_shards
+from . import catalog_manifest
+from . import scan_ignore
+
+
+class Constants:
+    extension = ".zip"
+    scripts_dir_name = "scripts"
+    shared_config_name = "shared_config.json"
+    sidecar_config_suffix = ".shared_config.json"
+
+k = Constants
+
+
+def is_bundle(root_dir):
+    return root_dir.lower().endswith(k.extension) and os.path.isfile(root_dir)
+
+
+def get_sidecar_config_path(bundle_path):
+    return bundle_path + k.sidecar_config_suffix
+
+
+def get_import_path(bundle_path):
+    """sys.path entry that makes zipimport look inside the scripts folder of the bundle"""
+    return os.path.join(bundle_path, k.scripts_dir_name)
+
+
+class ScriptBundle():
+    def __init__(self, bundle_path, stat_key):
+        import zipfile
+
+        self.bundle_path = bundle_path
+        self.stat_key = stat_key
+
+        with open(bundle_path, "rb") as fp:
+            # one read for the whole bundle instead of a round trip per file
+            self._zip_file = zipfile.ZipFile(io.BytesIO(fp.read()))
+        self.names = frozenset(self._zip_file.namelist())
+
+        # zip member name: code object, compiled when the script first runs
+        self._code_objects = {}
+
+        # the zip file shares one file position between readers
+        self._lock = threading.Lock()
+
+    def read(self, name):
+        with self._lock:
+            return self._zip_file.read(name)
+
+    def read_json(self, name):
+        if name not in self.names:
+            return {}
+        return json.loads(self.read(name))
+
+    def walk_scripts(self, dir_records_out=None):
+        """Same (parent_dir, relative_dir, file_names) as catalog_manifest.walk_scripts_dir, without touching the disk"""
+        dir_files = {}
+        dir_children = {".": []}
+
+        prefix = k.scripts_dir_name + "/"
+        for name in sorted(self.names):
+            if not name.startswith(prefix) or name.endswith("/"):
+                continue
+
+            relative_dir, _, file_name = name[len(prefix):].rpartition("/")
+            relative_dir = relative_dir or "."
+            dir_files.setdefault(relative_dir, []).append(file_name)
+
+            # zips don't always have entries for folders, add every parent on the way up
+            while relative_dir not in dir_children:
+                dir_children[relative_dir] = []
+                parent_dir, _, dir_name = relative_dir.rpartition("/")
+                parent_dir = parent_dir or "."
+                if parent_dir in dir_children:
+                    dir_children[parent_dir].append(dir_name)
+                    break
+                dir_children[parent_dir] = [dir_name]
+                relative_dir = parent_dir
+
+        scripts_root_path = get_import_path(self.bundle_path)
+        for relative_dir in sorted(dir_children):
+            file_names = dir_files.get(relative_dir, [])
+            if dir_records_out is not None:
+                dir_records_out[relative_dir] = {"mtime": self.stat_key[0], "files": file_names, "dirs": dir_children[relative_dir]}
+
+            parent_dir = scripts_root_path if relative_dir == "." else os.path.join(scripts_root_path, *relative_dir.split("/"))
+            yield parent_dir, relative_dir, file_names
+
+    def get_code(self, relative_path):
+        name = relative_path.replace(os.sep, "/")
+        code = self._code_objects.get(name)
+        if code is None:
+            code = compile(self.read(name), os.path.join(self.bundle_path, relative_path), "exec", dont_inherit=True)
+            self._code_objects[name] = code
+        return code
+
+
+_bundles = {}
+
+
+def get_bundle(bundle_path) -> ScriptBundle:
+    """Loaded once, and again whenever the bundle file gets replaced"""
+    stat_key = file_utils.get_stat_key(bundle_path)
+    if stat_key is None:
+        raise FileNotFoundError(f"Bundle not found: {bundle_path}")
+
+    bundle = _bundles.get(bundle_path)
+    if bundle is None or bundle.stat_key != stat_key:
+        bundle = ScriptBundle(bundle_path, stat_key)
+        _bundles[bundle_path] = bundle
+
+        # zipimport keeps its own copy of the central directory
+        importer = sys.path_importer_cache.get(get_import_path(bundle_path))
+        if hasattr(importer, "invalidate_caches"):
+            importer.invalidate_caches()
+
+    return bundle
+
+
+def find_bundle_script(script_path):
+    """
+    (bundle, path relative to the bundle) when the script lives in a bundle, otherwise None.
+    The bundle gets loaded here if it isn't yet, a catalog loaded from the shared catalog never scanned it.
+    """
+    lower_path = script_path.lower()
+    marker = k.extension + os.sep
+    index = lower_path.find(marker)
+    while index != -1:
+        bundle_path = script_path[:index + len(k.extension)]
+        if is_bundle(bundle_path):
+            return get_bundle(bundle_path), script_path[len(bundle_path) + 1:]
+        index = lower_path.find(marker, index + 1)
+    return None
+
+
+def pack_root(root_dir, bundle_path):
+    """Bundle the scripts folder and the resolved shared config of a root dir, returns the number of files packed"""
+    shared_config = config_journal.read_config(os.path.join(root_dir, k.shared_config_name))
+
+    # the whole bundle is read at once anyway, so shards get folded back into one config
+    if config_shards.is_sharded(shared_config):
+        script_configs = shared_config.setdefault(config_shards.k.script_configs, {})
+        for shard_path in config_shards.iter_shard_paths(root_dir):
+            script_configs.update(config_shards.read_shard(shard_path))
+        shared_config.pop(config_shards.k.sharded_flag)
+
+    import zipfile
+
+    file_count = 0
+    # replaced in one go, so people running from the bundle never read a half written one
+    with file_utils.atomic_write(bundle_path, "wb") as fp, zipfile.ZipFile(fp, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr(k.shared_config_name, json.dumps(shared_config, indent=2))
+
+        scripts_root_path = os.path.join(root_dir, k.scripts_dir_name)
+        ignore_rules = scan_ignore.get_root_rules(root_dir)
+        for parent_dir, relative_dir, file_names in catalog_manifest.walk_scripts_dir(scripts_root_path, ignore_rules=ignore_rules):
+            member_dir = k.scripts_dir_name if relative_dir == "." else f"{k.scripts_dir_name}/{relative_dir}"
+            for file_name in file_names:
+                zip_file.write(os.path.join(parent_dir, file_name), f"{member_dir}/{file_name}")
+                file_count += 1
+
+    return file_count
@@ -0,0 +1,169 @@
+"""
+Inverted index over the identifiers, comments and docstrings of every script, for searching by what a script does.
+
+Built on a background thread, and cached on disk by path + mtime + size so only new or edited scripts are read
+again. Queries never touch the filesystem.
+"""
+import io
+import os
+import re
+import json
+import bisect
+import keyword
+import threading
+
+from . import file_utils
+from . import script_panel_metrics
+
+
+class Constants:
+    cache_file_name = "content_index_cache.json"
+    min_word_length = 2
+
+k = Constants
+
+
+# splits snake_case and camelCase into their parts
+WORD_PART_RE = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|[0-9]+")
+IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+PYTHON_KEYWORDS = set(keyword.kwlist)
+
+
+def get_cache_path(config_dir):
+    return os.path.join(config_dir, k.cache_file_name)
+
+
+def add_words(words, text):
+    for identifier in IDENTIFIER_RE.findall(text):
+        if identifier in PYTHON_KEYWORDS:
+            continue
+        words.add(identifier.lower())
+        words.update(part.lower() for part in WORD_PART_RE.findall(identifier))
+
+
+def get_source_words(source):
+    # only needed on the indexing thread
+    import ast
+    import tokenize
+
+    words = set()
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(source).readline):
+            if token.type in (tokenize.NAME, tokenize.COMMENT):
+                add_words(words, token.string)
+
+        for node in ast.walk(ast.parse(source)):
+            if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                add_words(words, ast.get_docstring(node) or "")
+
+    except (tokenize.TokenError, SyntaxError, ValueError):
+        # broken scripts still get indexed, just less precisely
+        add_words(words, source)
+
+    return sorted(word for word in words if len(word) >= k.min_word_length)
+
+
+def get_query_words(query):
+    return [word for word in re.split(r"[^a-z0-9_]+", query.lower()) if word]
+
+
+def load_cache(cache_path):
+    try:
+        with open(cache_path, "r") as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_stale_paths(cache_path, script_paths):
+    """Scripts that are missing from the cache or were edited since it was written"""
+    documents = load_cache(cache_path)
+    return [
+        script_path for script_path in script_paths
+        if script_path not in documents or documents[script_path][0] != file_utils.get_stat_key(script_path)
+        ]
+
+
+class ContentIndex():
+    def __init__(self):
+        # script path: [file stat, words]
+        self.documents = {}
+
+        # (word: set of script paths, sorted list of all words for prefix lookups)
+        # kept in one tuple so a search never sees half of an update
+        self.index = ({}, [])
+
+        self._update_lock = threading.Lock()
+        self._last_query = None
+
+    def update(self, script_paths, cache_path=None):
+        """
+        Index the scripts, reusing what's cached. Safe to call from a thread, readers keep using the old index until it's done.
+        Returns how many scripts had to be read from disk.
+        """
+        with self._update_lock:
+            previous_documents = self.documents
+            if not previous_documents and cache_path:
+                previous_documents = load_cache(cache_path)
+
+            documents = {}
+            read_count = 0
+            for script_path in script_paths:
+                file_stat = file_utils.get_stat_key(script_path)
+                if file_stat is None:
+                    continue
+
+                previous = previous_documents.get(script_path)
+                if previous and previous[0] == file_stat:
+                    documents[script_path] = previous
+                    continue
+
+                try:
+                    with open(script_path, "r", encoding="utf-8", errors="replace") as fp:
+                        documents[script_path] = [file_stat, get_source_words(fp.read())]
+                    read_count += 1
+                except OSError:
+                    continue
+
+            script_panel_metrics.inc("content_index_cache_hits", len(documents) - read_count)
+            script_panel_metrics.inc("content_index_cache_misses", read_count)
+
+            postings = {}
+            for script_path, (_, words) in documents.items():
+                for word in words:
+                    postings.setdefault(word, set()).add(script_path)
+
+            self.documents = documents
+            self.index = (postings, sorted(postings.keys()))
+            self._last_query = None
+
+            if cache_path and (read_count or len(documents) != len(previous_documents)):
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                file_utils.write_json(cache_path, documents)
+
+            return read_count
+
+    def search(self, query):
+        """Paths of scripts that contain a word starting with every word of the query"""
+        index = self.index
+        last_query = self._last_query
+        if last_query and last_query[0] == query and last_query[1] is index:
+            return last_query[2]
+
+        postings, sorted_words = index
+
+        matching_paths = None
+        for query_word in get_query_words(query):
+            word_matches = set()
+            i = bisect.bisect_left(sorted_words, query_word)
+            while i < len(sorted_words) and sorted_words[i].startswith(query_word):
+                word_matches.update(postings[sorted_words[i]])
+                i += 1
+
+            matching_paths = word_matches if matching_paths is None else matching_paths & word_matches
+            if not matching_paths:
+                break
+
+        matching_paths = matching_paths or set()
+        self._last_query = (query, index, matching_paths)
+        return matching_paths
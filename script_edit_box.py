@@ -24,12 +24,25 @@ class ScriptPanel_EditBox(bpy.types.PropertyGroup):
         subtype="FILE_PATH",
         )
 
+    tags: bpy.props.StringProperty(
+        name="Tags",
+        description="Comma separated, write them as kind:value to group them in the filters, e.g. department:rigging, risk:high",
+        )
+
+    use_undo: bpy.props.BoolProperty(
+        name="Undo Step",
+        default=True,
+        description="Create an undo step when running this script.\nTurn off for scripts that only read data or write files, the undo step can be slow on heavy scenes",
+        )
+
     def to_config_dict(self):
         return {
             "label": self.label,
             "tooltip": self.tooltip,
             "icon_name": self.icon_name,
             "icon_path": self.icon_path,
+            "use_undo": self.use_undo,
+            "tags": [tag.strip() for tag in self.tags.split(",") if tag.strip()],
         }
 
 
@@ -48,6 +61,7 @@ class ScriptPanel_SaveEditingBox(bpy.types.Operator):
 
         script.update_from_dict(edit_box.to_config_dict())
         script.save_to_config(to_local=self.to_local)
+        script_handler.instance.on_script_changed(script)
 
         remove_edit_box(edit_box)
         return {"FINISHED"}
@@ -80,6 +94,8 @@ class ScriptPanel_ToggleScriptEditingBox(bpy.types.Operator):
             new_box.tooltip = script.tooltip
             new_box.icon_name = script.icon_name
             new_box.icon_path = script.icon_path
+            new_box.use_undo = script.use_undo
+            new_box.tags = ", ".join(script.tags)
 
         return {"FINISHED"}
 
@@ -113,6 +129,35 @@ class ScriptPanel_ReorderFavorite(bpy.types.Operator):
         return {"FINISHED"}
 
 
+class ScriptPanel_AddToMacro(bpy.types.Operator):
+    bl_idname = "scriptpanel.add_to_macro"
+    bl_label = "Add To Macro"
+    bl_description = "Add this script as the last step of a macro, macros run several scripts as one undo step"
+
+    macro_name: bpy.props.StringProperty(name="Macro", default="Macro")
+    script_path: bpy.props.StringProperty()
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        script = script_handler.instance.get_script_from_path(self.script_path)
+        script_handler.instance.add_to_macro(self.macro_name, script)
+        return {"FINISHED"}
+
+
+class ScriptPanel_RemoveMacro(bpy.types.Operator):
+    bl_idname = "scriptpanel.remove_macro"
+    bl_label = "Remove Macro"
+    bl_description = "Remove this macro, the scripts themselves are not touched"
+
+    macro_name: bpy.props.StringProperty()
+
+    def execute(self, context):
+        script_handler.instance.set_macro(self.macro_name, [])
+        return {"FINISHED"}
+
+
 class ScriptPanel_IconSearchPopup(bpy.types.Operator):
     bl_idname = "script_panel.icon_search_popup"
     bl_label = "Icon Search"
@@ -121,7 +166,7 @@ class ScriptPanel_IconSearchPopup(bpy.types.Operator):
     icon_enum: bpy.props.EnumProperty(
         name="Objects",
         description="",
-        items=icon_manager.get_default_icon_enum(),
+        items=icon_manager.get_default_icon_enum,
         )
     
     script_path: bpy.props.StringProperty()
@@ -183,6 +228,13 @@ def draw_script_edit_box(parent, edit_box : ScriptPanel_EditBox):
     search_popup.script_path = edit_box.script_path
 
     box.prop(edit_box, "icon_path")
+    box.prop(edit_box, "tags")
+    box.prop(edit_box, "use_undo")
+
+    draw_import_report(box, script_handler.instance.get_script_from_path(edit_box.script_path))
+
+    add_to_macro_op = box.operator(ScriptPanel_AddToMacro.bl_idname, icon="PLUS")
+    add_to_macro_op.script_path = edit_box.script_path
     
     save_row = box.row()
     save_row.scale_y = 2
@@ -205,12 +257,31 @@ def draw_script_edit_box(parent, edit_box : ScriptPanel_EditBox):
     box.separator()
 
 
+def draw_import_report(parent, script, max_modules=10):
+    import_report = script_handler.instance.get_import_report(script) if script else None
+    if not import_report:
+        return
+
+    report_box = parent.box()
+    report_box.label(text=f"Imports: {import_report['total'] * 1000:.0f} ms", icon="TIME")
+
+    if not import_report["modules"]:
+        report_box.label(text="No new modules imported")
+
+    for module_name, self_duration, duration in import_report["modules"][:max_modules]:
+        module_row = report_box.row()
+        module_row.label(text=module_name)
+        module_row.label(text=f"{duration * 1000:.1f} ms (self {self_duration * 1000:.1f} ms)")
+
+
 CLASSES = (
     ScriptPanel_EditBox,
     ScriptPanel_ToggleScriptEditingBox,
     ScriptPanel_SaveEditingBox,
     ScriptPanel_ToggleFavorite,
     ScriptPanel_ReorderFavorite,
+    ScriptPanel_AddToMacro,
+    ScriptPanel_RemoveMacro,
     ScriptPanel_IconSearchPopup,
 )
 
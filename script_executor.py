@@ -0,0 +1,459 @@
+"""
+Running the panel scripts, kept free of bpy so it can be used outside of blender too.
+"""
+import os
+import sys
+import time
+import importlib
+import threading
+import traceback
+
+from . import file_utils
+from . import script_bundles
+from . import script_panel_logger
+from . import script_panel_metrics
+
+log = script_panel_logger.get_logger()
+
+
+class ImportProfiler():
+    """
+    Records every module that gets imported for the first time while active, and how long each took.
+    Same idea as python -X importtime, self time excludes the time spent importing sub modules.
+    Only imports from the thread that entered the profiler are recorded, background threads keep importing as usual.
+    """
+    def __init__(self):
+        # (module name, self seconds, cumulative seconds) in the order the imports finished
+        self.records = []
+        self.total_duration = 0.0
+        self.thread_id = None
+        self._stack = []
+        self._finder = _TimingFinder(self)
+
+    def __enter__(self):
+        self.thread_id = threading.get_ident()
+        sys.meta_path.insert(0, self._finder)
+        return self
+
+    def __exit__(self, *args):
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+
+    def _start(self, module_name):
+        # [name, start time, time spent in nested imports]
+        self._stack.append([module_name, time.perf_counter(), 0.0])
+
+    def _stop(self):
+        module_name, start_time, child_duration = self._stack.pop()
+        duration = time.perf_counter() - start_time
+        if self._stack:
+            self._stack[-1][2] += duration
+        else:
+            self.total_duration += duration
+        self.records.append((module_name, duration - child_duration, duration))
+
+    def get_report(self):
+        modules = sorted(self.records, key=lambda record: record[2], reverse=True)
+        return {
+            "time": time.time(),
+            "total": self.total_duration,
+            "modules": [[name, self_duration, duration] for name, self_duration, duration in modules],
+        }
+
+
+class _TimingFinder():
+    # plain classes, sys.meta_path only needs find_spec() and importlib.abc is slow to import
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        # the next finder on sys.meta_path takes over
+        if threading.get_ident() != self.profiler.thread_id:
+            return None
+
+        spec = None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+
+        if spec is None or spec.loader is None or not hasattr(spec.loader, "exec_module"):
+            return spec
+
+        spec.loader = _TimingLoader(spec.loader, self.profiler)
+        return spec
+
+
+class _TimingLoader():
+    def __init__(self, loader, profiler):
+        self.loader = loader
+        self.profiler = profiler
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        # put the real loader back, so nothing outlives the profiling run
+        module.__loader__ = self.loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self.loader
+
+        self.profiler._start(module.__name__)
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.profiler._stop()
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class ModuleReloader():
+    """
+    Keeps helper modules that live in the root dirs up to date between script runs.
+
+    After each run, the modules under the root dirs that the script depends on (directly or through
+    other helpers) are remembered. Before the next run only those files get stat'ed, and the ones that
+    changed are reloaded together with the helpers that import them, dependencies first.
+    """
+    def __init__(self):
+        # script path: module names in dependency order
+        self.script_modules = {}
+
+        # module name: mtime of its file when it was last (re)loaded, None when that isn't known
+        self.module_mtimes = {}
+
+        # sys.modules keys right before the last script ran, to tell which modules the script imported itself
+        self._modules_before_run = set()
+
+        # file path: (mtime, imported module names), so files are only parsed when they change
+        self._import_cache = {}
+
+    def reload_stale_modules(self, script_path):
+        """Returns the names of the modules that were reloaded"""
+        reloaded_names = set()
+        for module_name in self.script_modules.get(script_path, ()):
+            module = sys.modules.get(module_name)
+            module_path = get_module_file(module)
+            if module_path is None:
+                continue
+
+            mtime = file_utils.get_mtime(module_path)
+            is_stale = mtime != self.module_mtimes.get(module_name)
+            depends_on_reloaded = any(name in reloaded_names for name in self.get_imports(module_path, module))
+            if not is_stale and not depends_on_reloaded:
+                continue
+
+            try:
+                importlib.reload(module)
+            except Exception as e:
+                log.warning(f"Failed to reload {module_name}: {e}", extra={"script_path": script_path})
+                continue
+
+            self.module_mtimes[module_name] = mtime
+            reloaded_names.add(module_name)
+
+        self._modules_before_run = set(sys.modules)
+
+        # order matches the dependency order since dependencies come first
+        return [module_name for module_name in self.script_modules.get(script_path, ()) if module_name in reloaded_names]
+
+    def track_script(self, script_path, root_dirs):
+        # with the separator, so a root of /studio/tools doesn't also match /studio/tools_old
+        root_prefixes = tuple(os.path.join(os.path.normcase(os.path.abspath(root_dir)), "") for root_dir in root_dirs)
+
+        ordered_names = []
+        visited = set()
+
+        def visit(file_path, module):
+            for module_name in self.get_imports(file_path, module):
+                if module_name in visited:
+                    continue
+                visited.add(module_name)
+
+                imported_module = sys.modules.get(module_name)
+                imported_path = get_module_file(imported_module)
+                if imported_path is None:
+                    continue
+
+                if not os.path.normcase(os.path.abspath(imported_path)).startswith(root_prefixes):
+                    continue
+
+                visit(imported_path, imported_module)
+
+                # post order, so every module comes after what it imports
+                ordered_names.append(module_name)
+
+                # only a module the script imported itself is known to match its file, one that was already
+                # imported may have been edited since and gets reloaded before the next run
+                if module_name not in self.module_mtimes:
+                    is_new = module_name not in self._modules_before_run
+                    self.module_mtimes[module_name] = file_utils.get_mtime(imported_path) if is_new else None
+
+        visit(script_path, None)
+        self.script_modules[script_path] = ordered_names
+
+    def get_imports(self, file_path, module=None):
+        mtime = file_utils.get_mtime(file_path)
+        cached = self._import_cache.get(file_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        package_name = getattr(module, "__package__", None) or ""
+        imported_names = get_imported_module_names(file_path, package_name)
+        self._import_cache[file_path] = (mtime, imported_names)
+        return imported_names
+
+
+def get_module_file(module):
+    module_path = getattr(module, "__file__", None)
+    if not module_path or not module_path.endswith(".py"):
+        return None
+    return module_path
+
+
+def get_imported_module_names(file_path, package_name=""):
+    """Every module name the file could import, including the parent packages"""
+    import ast
+
+    try:
+        with open(file_path, "rb") as fp:
+            tree = ast.parse(fp.read(), file_path)
+    except (OSError, SyntaxError, ValueError):
+        return ()
+
+    candidate_names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            candidate_names.extend(alias.name for alias in node.names)
+
+        elif isinstance(node, ast.ImportFrom):
+            base_name = node.module or ""
+            if node.level:
+                package_parts = package_name.split(".") if package_name else []
+                if node.level > 1:
+                    package_parts = package_parts[:-(node.level - 1)]
+                base_name = ".".join(part for part in package_parts + [base_name] if part)
+
+            if base_name:
+                candidate_names.append(base_name)
+
+            # 'from package import module' imports a sub module
+            candidate_names.extend(f"{base_name}.{alias.name}" if base_name else alias.name for alias in node.names)
+
+    imported_names = []
+    for candidate_name in candidate_names:
+        parts = candidate_name.split(".")
+        for i in range(1, len(parts) + 1):
+            module_name = ".".join(parts[:i])
+            if module_name not in imported_names:
+                imported_names.append(module_name)
+    return tuple(imported_names)
+
+
+module_reloader = ModuleReloader()
+
+
+def run_path(script_path, init_globals=None):
+    """runpy.run_path that can also run scripts from inside a zip bundle"""
+    bundle_script = script_bundles.find_bundle_script(script_path)
+    if bundle_script is None:
+        import runpy
+        return runpy.run_path(script_path, init_globals=init_globals)
+
+    bundle, relative_path = bundle_script
+
+    # helper packages in the bundle get imported through zipimport
+    import_path = script_bundles.get_import_path(bundle.bundle_path)
+    if import_path not in sys.path:
+        sys.path.append(import_path)
+
+    # same globals runpy sets up for a plain file
+    run_globals = dict(init_globals or {})
+    run_globals.update(
+        __name__="<run_path>",
+        __file__=script_path,
+        __cached__=None,
+        __doc__=None,
+        __loader__=None,
+        __package__=None,
+        __spec__=None,
+        )
+    exec(bundle.get_code(relative_path), run_globals)
+    return run_globals
+
+
+def log_script_run(script_path, start_time, failed=False):
+    """Structured record of the run in the log buffer, the traceback still goes to the console through blender"""
+    duration = time.perf_counter() - start_time
+    if failed:
+        script_panel_logger.buffer_handler.add_entry("ERROR", traceback.format_exc(), script_path, duration)
+    else:
+        log.info(f"Ran {os.path.basename(script_path)}", extra={"script_path": script_path, "duration": duration})
+
+
+def get_run_generator(run_globals):
+    """
+    Scripts can do their work in a generator function called run(), yielding every now and then so they can be
+    stepped a slice at a time, see ScriptStepper. Returns the started generator, or None for a regular script.
+    """
+    import inspect
+
+    run_func = run_globals.get("run")
+    if not inspect.isgeneratorfunction(run_func):
+        return None
+    return run_func()
+
+
+class ScriptStepper():
+    """
+    Runs the generator of a script's run() a slice of time at a time, so blender gets to redraw in between.
+    What the script yields is its progress: a float from 0 to 1, (done, total), a message or None.
+    """
+    def __init__(self, script_path, generator, start_time):
+        self.script_path = script_path
+        self.progress = 0.0
+        self.message = ""
+        self.is_finished = False
+
+        self._generator = generator
+        self._start_time = start_time
+
+    def step(self, time_budget):
+        """Run for about time_budget seconds, returns True once the script is done. Errors of the script are raised."""
+        end_time = time.perf_counter() + time_budget
+        try:
+            with script_panel_logger.capture_output(self.script_path):
+                while time.perf_counter() < end_time:
+                    self._set_progress(next(self._generator))
+
+        except StopIteration:
+            self._finish()
+
+        except Exception:
+            self.is_finished = True
+            log_script_run(self.script_path, self._start_time, failed=True)
+            raise
+
+        return self.is_finished
+
+    def run_to_end(self):
+        while not self.step(1.0):
+            pass
+
+    def cancel(self):
+        """Stops the script at its current yield, its finally blocks and with statements still run"""
+        self.is_finished = True
+        with script_panel_logger.capture_output(self.script_path):
+            self._generator.close()
+        script_panel_logger.buffer_handler.add_entry("WARNING", "Cancelled", self.script_path, time.perf_counter() - self._start_time)
+
+    def _finish(self):
+        self.is_finished = True
+        self.progress = 1.0
+        script_panel_metrics.observe("script_run_seconds", time.perf_counter() - self._start_time, "duration of a script run")
+        log_script_run(self.script_path, self._start_time)
+
+    def _set_progress(self, value):
+        if isinstance(value, str):
+            self.message = value
+        elif isinstance(value, tuple) and len(value) == 2:
+            done, total = value
+            self.progress = done / total if total else 0.0
+            self.message = f"{done}/{total}"
+        elif isinstance(value, (int, float)):
+            self.progress = float(value)
+
+
+def run_script(script_path, profile_imports=False, reload_root_dirs=None):
+    """
+    Returns a report of the modules the script imported when profiling.
+    With reload_root_dirs, helper modules under those dirs are reloaded when they changed since the last run.
+    A generator run() is run to the end, use start_script() to step it instead.
+    """
+    stepper, import_report = start_script(script_path, profile_imports, reload_root_dirs)
+    if stepper is not None:
+        stepper.run_to_end()
+    return import_report
+
+
+def start_script(script_path, profile_imports=False, reload_root_dirs=None):
+    """
+    Runs the script, but when it defines a generator run() that is only started.
+    Returns (ScriptStepper or None when the script is already done, import report or None).
+    """
+    if reload_root_dirs:
+        module_reloader.reload_stale_modules(script_path)
+
+    script_panel_metrics.inc("script_runs", description="scripts started from the panel")
+    start_time = time.perf_counter()
+    try:
+        with script_panel_logger.capture_output(script_path):
+            if profile_imports:
+                # run_path() imports these on first use, they mustn't show up as imports of the script
+                import runpy
+                import pkgutil
+
+                with ImportProfiler() as profiler:
+                    run_globals = run_path(script_path)
+                import_report = profiler.get_report()
+            else:
+                run_globals = run_path(script_path)
+                import_report = None
+
+            generator = get_run_generator(run_globals)
+
+    except Exception:
+        log_script_run(script_path, start_time, failed=True)
+        raise
+
+    finally:
+        if reload_root_dirs:
+            module_reloader.track_script(script_path, reload_root_dirs)
+
+    if generator is not None:
+        return ScriptStepper(script_path, generator, start_time), import_report
+
+    script_panel_metrics.observe("script_run_seconds", time.perf_counter() - start_time, "duration of a script run")
+    log_script_run(script_path, start_time)
+    return None, import_report
+
+
+def run_scripts(script_paths, reload_root_dirs=None):
+    """
+    Runs the scripts one after the other, each step starts with the globals the previous step ended with.
+    Returns the duration of each step.
+    """
+    step_durations = []
+    shared_globals = None
+    for script_path in script_paths:
+        start_time = time.perf_counter()
+
+        if reload_root_dirs:
+            module_reloader.reload_stale_modules(script_path)
+        try:
+            with script_panel_logger.capture_output(script_path):
+                previous_run_func = shared_globals.get("run") if shared_globals else None
+                shared_globals = run_path(script_path, init_globals=shared_globals)
+
+                # a macro is one undo step, so stepped scripts run to the end here.
+                # run() can also come from an earlier step, only run it again when this step defined it
+                generator = get_run_generator(shared_globals) if shared_globals.get("run") is not previous_run_func else None
+                if generator is not None:
+                    for _ in generator:
+                        pass
+
+        except Exception:
+            log_script_run(script_path, start_time, failed=True)
+            raise
+
+        finally:
+            if reload_root_dirs:
+                module_reloader.track_script(script_path, reload_root_dirs)
+
+        log_script_run(script_path, start_time)
+        step_durations.append(time.perf_counter() - start_time)
+        script_panel_metrics.observe("macro_step_seconds", step_durations[-1], "duration of a single macro step")
+    return step_durations
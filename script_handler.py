@@ -1,38 +1,148 @@
 import os
+import sys
+import copy
 import json
+import time
+import itertools
+import threading
+import collections
+import collections.abc
+
+from . import file_utils
+from . import config_journal
+from . import config_shards
+from . import script_bundles
+from . import shared_catalog
+from . import remote_catalog
+from . import catalog_manifest
+from . import scan_ignore
+from . import catalog_database
+from . import usage_tracker
+from . import script_validation
+from . import script_content_index
+from . import script_panel_logger
+from . import script_panel_metrics
+
+log = script_panel_logger.get_logger()
 
 class Constants:
     script_configs = "script_configs"
     favorites = "favorites"
+    macros = "macros"
+    import_reports_file_name = "import_profiles.json"
+    config_dir_env_var = "SCRIPT_PANEL_CONFIG_DIR"
+
+    # under the local config folder, shared settings of the scripts from script source providers
+    script_sources_dir_name = "script_sources"
+
+    # searches kept around while typing, going back to one of these doesn't search again
+    max_cached_searches = 16
+
+    # facet of tags written without "facet:" in front
+    default_tag_facet = "tags"
+
+    # turns the ascii 0/1 of bin() into 0/1 bytes, for itertools.compress
+    bit_selectors = bytes.maketrans(b"01", b"\x00\x01")
 
 k = Constants
 
 
+class ScriptRoot():
+    """Strings that every script in a root dir has in common, stored once instead of on each script"""
+    __slots__ = ("root_dir", "shared_config_path", "local_config_path", "is_sharded", "is_bundle")
+
+    def __init__(self, root_dir="", shared_config_path="", local_config_path="", is_sharded=False, is_bundle=False):
+        self.root_dir = sys.intern(root_dir)
+        self.shared_config_path = sys.intern(shared_config_path)
+        self.local_config_path = sys.intern(local_config_path)
+
+        # shared script configs are split into per-folder shards, see config_shards
+        self.is_sharded = is_sharded
+
+        # root_dir is a zip made by script_bundles.pack_root, its scripts aren't files on disk
+        self.is_bundle = is_bundle
+
+
+EMPTY_ROOT = ScriptRoot()
+
+
 class Script():
-    def __init__(self):
-        self.path = ""
-        self.label = ""
+    # catalogs can hold 100k+ of these, so no per instance __dict__
+    __slots__ = (
+        "root",
+        "relative_path",
+        "relative_dir",
+        "tooltip",
+        "icon_name",
+        "icon_path",
+        "use_undo",
+        "tags",
+        "is_favorited",
+        "lower_label",
+        "_label",
+        "_default_label",
+        )
+
+    def __init__(self, root=EMPTY_ROOT, relative_path="", relative_dir=""):
+        self.root : ScriptRoot = root
+        self.relative_path = relative_path
+        self.relative_dir = sys.intern(relative_dir)
         self.tooltip = ""
         self.icon_name = ""
         self.icon_path = ""
-        self.relative_dir = ""
-        self.relative_path = ""
-        self.local_config_path = ""
-        self.shared_config_path = ""
+        self.use_undo = True
+
+        # "facet:value" strings, e.g. "department:rigging"
+        self.tags = ()
 
         self.is_favorited = False
 
+        # only stored when it differs from the file name
+        self._label = None
+
+        # computed once, searching and drawing read these for every script
+        self._default_label = sys.intern(get_default_label(relative_path))
+        self.lower_label = get_lower_label(self._default_label)
+
+    @property
+    def path(self):
+        return os.path.join(self.root.root_dir, self.relative_path)
+
+    @property
+    def local_config_path(self):
+        return self.root.local_config_path
+
+    @property
+    def shared_config_path(self):
+        return self.root.shared_config_path
+
+    @property
+    def label(self):
+        if self._label is None:
+            return self._default_label
+        return self._label
+
+    @label.setter
+    def label(self, value):
+        self._label = None if value == self._default_label else value
+        self.lower_label = get_lower_label(self.label)
+
     def update_from_dict(self, config):
         self.label = config.get("label", self.label)
         self.tooltip = config.get("tooltip", self.tooltip)
         self.icon_name = config.get("icon_name", self.icon_name)
         self.icon_path = config.get("icon_path", self.icon_path)
+        self.use_undo = config.get("use_undo", self.use_undo)
+
+        tags = config.get("tags")
+        if tags is not None:
+            self.tags = tuple(sys.intern(str(tag)) for tag in tags)
 
     def to_dict(self):
         out_dict = {}
 
-        if self.label and self.label != get_default_label(self.path):
-            out_dict["label"] = self.label
+        if self._label:
+            out_dict["label"] = self._label
 
         if self.tooltip:
             out_dict["tooltip"] = self.tooltip
@@ -43,6 +153,12 @@ class Script():
         if self.icon_path:
             out_dict["icon_path"] = self.icon_path
 
+        if not self.use_undo:
+            out_dict["use_undo"] = False
+
+        if self.tags:
+            out_dict["tags"] = list(self.tags)
+
         return out_dict
         
     def get_config_key(self):
@@ -50,7 +166,20 @@ class Script():
         return self.relative_path
 
     def save_to_config(self, to_local):
-        config_path = self.local_config_path if to_local else self.shared_config_path
+        config_dict = self.to_dict()
+        config_key = self.get_config_key()
+
+        if not to_local:
+            config_path = self.shared_config_path
+            if self.root.is_sharded:
+                config_path = config_shards.get_shard_path(self.root.root_dir, config_key)
+
+            # the shared config is edited by many people at once, so only append the change
+            # if nothing relevant is in the config, remove the entry entirely
+            config_journal.append_change(config_path, k.script_configs, config_key, config_dict or None)
+            return
+
+        config_path = self.local_config_path
 
         full_config_data = {}
         if os.path.exists(config_path):
@@ -58,9 +187,7 @@ class Script():
                 full_config_data = json.load(fp)
 
         script_configs = full_config_data.get(k.script_configs, {})
-        config_dict = self.to_dict()
 
-        config_key = self.get_config_key()
         if not config_dict and config_key in script_configs.keys():
             # if nothing relevant is in the config, remove the entry entirely
             script_configs.pop(config_key)
@@ -130,116 +257,1051 @@ class Script():
         return full_config_data
     
 
+class ScriptMap(collections.abc.Mapping):
+    """
+    Scripts by path, without a path string per script. Each script is stored under its root dir and the relative
+    path it already holds, lookups split the path into those two again.
+    """
+    __slots__ = ("_scripts_by_root", "_root_prefixes", "_length")
+
+    def __init__(self, scripts=()):
+        scripts = list(scripts)
+
+        # root dir: {relative path: script}
+        self._scripts_by_root = group_scripts_by_root(scripts)
+
+        # script sources have no root dir and an absolute relative path, so "" matches them
+        root_prefixes = {root_dir: os.path.join(root_dir, "") if root_dir else "" for root_dir in self._scripts_by_root}
+
+        # with a root dir inside another one, or script sources, the same file can come up twice. Like in a
+        # dict by path the script added last wins, the paths are only built for that case and dropped again.
+        if any(prefix != other_prefix and prefix.startswith(other_prefix) for prefix in root_prefixes.values() for other_prefix in root_prefixes.values()):
+            self._scripts_by_root = group_scripts_by_root({script.path: script for script in scripts}.values())
+
+        # longest first, so a path in a nested root dir is split at the nested one
+        self._root_prefixes = sorted(
+            ((root_prefixes[root_dir], root_scripts) for root_dir, root_scripts in self._scripts_by_root.items()),
+            key=lambda prefix_scripts: len(prefix_scripts[0]),
+            reverse=True,
+            )
+
+        self._length = sum(len(root_scripts) for root_scripts in self._scripts_by_root.values())
+
+    def get(self, path, default=None):
+        for prefix, root_scripts in self._root_prefixes:
+            if path.startswith(prefix):
+                script = root_scripts.get(path[len(prefix):])
+                if script is not None:
+                    return script
+        return default
+
+    def __getitem__(self, path):
+        script = self.get(path)
+        if script is None:
+            raise KeyError(path)
+        return script
+
+    def __contains__(self, path):
+        return self.get(path) is not None
+
+    def __iter__(self):
+        for script in self.values():
+            yield script.path
+
+    def __len__(self):
+        return self._length
+
+    def values(self):
+        for root_scripts in self._scripts_by_root.values():
+            yield from root_scripts.values()
+
+    def items(self):
+        for script in self.values():
+            yield script.path, script
+
+
+def group_scripts_by_root(scripts):
+    scripts_by_root = {}
+    for script in scripts:
+        scripts_by_root.setdefault(script.root.root_dir, {})[script.relative_path] = script
+    return scripts_by_root
+
+
+class Catalog():
+    """Every script found in a set of root dirs. Built in one go and never modified after it's published."""
+    def __init__(self, root_dirs=(), scripts=(), favorite_scripts=(), primary_dir=None, default_expand_states=None, dir_mtimes=None, shard_paths=None):
+        self.root_dirs = tuple(root_dirs)
+        self.scripts = ScriptMap(scripts)
+        self.favorite_scripts = tuple(favorite_scripts)
+        self.primary_dir = primary_dir
+        self.default_expand_states = default_expand_states or {}
+        self.dir_mtimes = dir_mtimes or {}
+
+        # relative dir: config shard of that folder, only for sharded roots. Applied by ScriptHandler.load_config_shards()
+        self.shard_paths = shard_paths or {}
+
+        self.scripts_by_config_key = {}
+        self.scripts_by_dir = {}
+        for script in self.scripts.values():
+            self.scripts_by_config_key[script.get_config_key()] = script
+            self.scripts_by_dir.setdefault(script.relative_dir, []).append(script)
+
+        # relative dir: the folder and all its parent folders, for rolling counts up the hierarchy
+        self.dir_ancestors = {relative_dir: get_dir_ancestors(relative_dir) for relative_dir in self.scripts_by_dir}
+
+        # relative dir: number of scripts in it, including sub folders
+        self.dir_script_counts = {}
+        for relative_dir, dir_scripts in self.scripts_by_dir.items():
+            for ancestor_dir in self.dir_ancestors[relative_dir]:
+                self.dir_script_counts[ancestor_dir] = self.dir_script_counts.get(ancestor_dir, 0) + len(dir_scripts)
+
+    def with_favorites(self, favorite_scripts):
+        catalog = copy.copy(self)
+        catalog.favorite_scripts = tuple(favorite_scripts)
+        return catalog
+
+
+class SearchResult():
+    """Scripts matching a search, with the number of matches per folder rolled up into the parent folders"""
+    __slots__ = ("filter_text", "scripts", "lower_labels", "dir_match_counts", "matching_dirs", "tag_bits", "usage_sorted")
+
+    def __init__(self, filter_text, scripts, lower_labels, dir_match_counts):
+        self.filter_text = filter_text
+        self.scripts = scripts
+        self.dir_match_counts = dir_match_counts
+        self.matching_dirs = {script.relative_dir for script in scripts}
+
+        # kept next to the scripts so narrowing down the search doesn't have to build every label again
+        self.lower_labels = lower_labels
+
+        # (tag index, bitset of the scripts), set by TagIndex.get_result_bits()
+        self.tag_bits = None
+
+        # (usage version, scripts with the most used first), set by ScriptHandler.get_usage_sorted_scripts()
+        self.usage_sorted = None
+
+
+class TagIndex():
+    """
+    Bitset per tag over the scripts of a catalog, python ints where bit i stands for scripts[i].
+    Tags of different facets are combined with and, tags of the same facet with or.
+    """
+    def __init__(self, scripts):
+        self.scripts = list(scripts)
+        self.script_ids = {script: i for i, script in enumerate(self.scripts)}
+
+        tag_ids = {}
+        for i, script in enumerate(self.scripts):
+            for tag in script.tags:
+                tag_ids.setdefault(tag, []).append(i)
+
+        self.tag_bits = {tag: self.get_ids_bits(ids) for tag, ids in tag_ids.items()}
+        self.tag_counts = {tag: len(ids) for tag, ids in tag_ids.items()}
+
+        # facet: its tags, sorted for drawing
+        self.facets = {}
+        for tag in sorted(tag_ids):
+            self.facets.setdefault(get_tag_facet(tag), []).append(tag)
+
+    def get_ids_bits(self, ids):
+        bit_bytes = bytearray((len(self.scripts) >> 3) + 1)
+        for i in ids:
+            bit_bytes[i >> 3] |= 1 << (i & 7)
+        return int.from_bytes(bit_bytes, "little")
+
+    def get_filter_bits(self, active_tags):
+        facet_bits = {}
+        for tag in active_tags:
+            facet = get_tag_facet(tag)
+            facet_bits[facet] = facet_bits.get(facet, 0) | self.tag_bits.get(tag, 0)
+
+        bits = (1 << len(self.scripts)) - 1
+        for tag_bits in facet_bits.values():
+            bits &= tag_bits
+        return bits
+
+    def get_result_bits(self, search_result : SearchResult):
+        """Bitset of the scripts in a search result, computed once per result"""
+        if search_result.tag_bits is None or search_result.tag_bits[0] is not self:
+            script_ids = self.script_ids
+            ids = [script_ids[script] for script in search_result.scripts if script in script_ids]
+            search_result.tag_bits = (self, self.get_ids_bits(ids))
+        return search_result.tag_bits[1]
+
+    def get_scripts(self, bits):
+        """Scripts whose bit is set, in catalog order"""
+        # lowest bit first, then one selector byte per script
+        selectors = bin(bits)[:1:-1].encode("ascii").translate(k.bit_selectors)
+        return list(itertools.compress(self.scripts, selectors))
+
+
+def get_tag_facet(tag):
+    facet, separator, _ = tag.partition(":")
+    return facet if separator else k.default_tag_facet
+
+
+def get_tag_value(tag):
+    _, separator, value = tag.partition(":")
+    return value if separator else tag
+
+
+def get_dir_ancestors(relative_dir):
+    """"a/b/c" -> ("a/b/c", "a/b", "a"). The unnamed root folder doesn't get a count."""
+    ancestors = []
+    while relative_dir:
+        ancestors.append(relative_dir)
+        relative_dir = relative_dir.rpartition("/")[0]
+    return tuple(ancestors)
+
+
+def build_catalog(root_dirs):
+    """Scan the root dirs from scratch. Doesn't touch any handler state, so it's safe to call from a thread."""
+    start_time = time.perf_counter()
+    scripts = []
+    primary_dir = None
+    default_expand_states = {}
+    dir_mtimes = {}
+    shard_paths = {}
+
+    local_config_path = get_local_config_path()
+
+    for root_dir in root_dirs:
+        if primary_dir is None:
+            primary_dir = root_dir
+        
+        bundle = script_bundles.get_bundle(root_dir) if script_bundles.is_bundle(root_dir) else None
+
+        scripts_root_path = os.path.join(root_dir, "scripts")
+        if bundle is None and not os.path.exists(scripts_root_path):
+            log.warning(f"Failed to find scripts folder: {scripts_root_path}")
+            continue
+        
+        if bundle is None:
+            shared_config_path = os.path.join(root_dir, "shared_config.json")
+            manifest = catalog_manifest.load_manifest(root_dir)
+
+            shared_config = catalog_manifest.get_shared_config(manifest, shared_config_path)
+            if shared_config is None:
+                shared_config = config_journal.read_config(shared_config_path)
+        else:
+            # the bundled config is read only, edits from the panel go to a config next to the bundle
+            shared_config_path = script_bundles.get_sidecar_config_path(root_dir)
+            shared_config = merge_dicts(bundle.read_json("shared_config.json"), config_journal.read_config(shared_config_path))
+        is_sharded = config_shards.is_sharded(shared_config)
+
+        combined_configs = merge_dicts(shared_config, config_journal.read_config(local_config_path))
+        script_root = ScriptRoot(root_dir, shared_config_path, local_config_path, is_sharded, bundle is not None)
+
+        # recalculate folder name since blender chucks an extra slash on a folder path
+        root_dir_name = os.path.basename(os.path.dirname(scripts_root_path))
+        if bundle is not None:
+            root_dir_name = os.path.splitext(root_dir_name)[0]
+
+        # if there's only one root path can skip a level of indendation in the UI
+        if len(root_dirs) == 1:
+            root_dir_name = ""
+
+        dir_records = {}
+        if bundle is None:
+            # folders that haven't changed since the manifest was published don't need to be listed again
+            ignore_rules = scan_ignore.get_root_rules(root_dir)
+            scripts_walk = catalog_manifest.walk_scripts_dir(scripts_root_path, manifest, dir_records, ignore_rules)
+        else:
+            # ignore rules were already applied when packing
+            scripts_walk = bundle.walk_scripts(dir_records)
+
+        for parent_dir, relative_dir, files in scripts_walk:
+            # folders inside a bundle don't exist on disk, the bundle file itself tells when they changed
+            if bundle is None:
+                dir_mtimes[parent_dir] = dir_records[relative_dir]["mtime"]
+
+            # calculate relative_dir for grouping display
+            default_expand_state = False
+            display_relative_dir = f"{root_dir_name}/{relative_dir}" if root_dir_name else relative_dir
+            if relative_dir == ".":
+                display_relative_dir = root_dir_name
+                default_expand_state = True
+
+            default_expand_states[display_relative_dir] = default_expand_state
+
+            if script_root.is_sharded:
+                shard_paths[display_relative_dir] = config_shards.get_dir_shard_path(root_dir, os.path.relpath(parent_dir, root_dir))
+
+            for script_file_name in sorted(files):
+                if os.path.splitext(script_file_name)[1] != ".py":
+                    continue
+
+                script_file_path = os.path.join(parent_dir, script_file_name)
+                script_relative_path = os.path.relpath(script_file_path, root_dir)
+
+                script_inst = Script(script_root, script_relative_path, display_relative_dir)
+
+                # update any extra settings that have been saved in a config
+                script_config = combined_configs.get(k.script_configs, {}).get(script_inst.get_config_key(), {})
+                script_inst.update_from_dict(script_config)
+
+                scripts.append(script_inst)
+
+    catalog = Catalog(root_dirs, scripts, (), primary_dir, default_expand_states, dir_mtimes, shard_paths)
+
+    script_panel_metrics.observe("scan_seconds", time.perf_counter() - start_time, "duration of a full catalog scan")
+    script_panel_metrics.set_gauge("catalog_scripts", len(scripts), "number of scripts in the catalog")
+    return catalog.with_favorites(find_favorite_scripts(catalog))
+
+
+def get_catalog_config_paths(root_dirs):
+    """Every file besides the scanned folders that build_catalog() reads"""
+    local_config_path = get_local_config_path()
+    config_paths = [local_config_path, config_journal.get_journal_path(local_config_path)]
+
+    for root_dir in root_dirs:
+        config_paths.extend(get_root_config_paths(root_dir))
+
+    return config_paths
+
+
+def get_root_config_paths(root_dir):
+    if script_bundles.is_bundle(root_dir):
+        shared_config_path = script_bundles.get_sidecar_config_path(root_dir)
+        config_paths = [root_dir]
+    else:
+        shared_config_path = os.path.join(root_dir, "shared_config.json")
+        config_paths = [os.path.join(root_dir, scan_ignore.k.file_name), catalog_manifest.get_manifest_path(root_dir)]
+
+    config_paths.extend((shared_config_path, config_journal.get_journal_path(shared_config_path)))
+    return config_paths
+
+
+def get_dir_sync_keys(catalog : Catalog):
+    """
+    relative dir: string that changes whenever the scripts of that folder or their configs can have changed,
+    from the folder mtime recorded by the scan and the stats of the config files. None when there's no way to tell.
+    """
+    local_config_path = get_local_config_path()
+    local_config_key = get_stat_keys_text((local_config_path, config_journal.get_journal_path(local_config_path)))
+
+    root_config_keys = {}
+    dir_sync_keys = {}
+    script : Script
+    for relative_dir, dir_scripts in catalog.scripts_by_dir.items():
+        script = dir_scripts[0]
+        script_root = script.root
+        if script_root.is_bundle:
+            # the bundle itself is one of the root config files
+            dir_key = "bundle"
+        else:
+            dir_key = catalog.dir_mtimes.get(os.path.dirname(script.path))
+
+        # scripts from a script source aren't in a scanned folder
+        if dir_key is None:
+            dir_sync_keys[relative_dir] = None
+            continue
+
+        root_config_key = root_config_keys.get(script_root.root_dir)
+        if root_config_key is None:
+            root_config_key = get_stat_keys_text(get_root_config_paths(script_root.root_dir))
+            root_config_keys[script_root.root_dir] = root_config_key
+
+        shard_path = catalog.shard_paths.get(relative_dir)
+        shard_key = get_stat_keys_text((shard_path,)) if shard_path else ""
+        dir_sync_keys[relative_dir] = f"{dir_key}|{len(dir_scripts)}|{shard_key}|{root_config_key}|{local_config_key}"
+
+    return dir_sync_keys
+
+
+def get_stat_keys_text(paths):
+    return ",".join(str(file_utils.get_stat_key(path)) for path in paths)
+
+
+def get_source_config_path(source_name):
+    return os.path.join(get_local_config_dir(), k.script_sources_dir_name, f"{source_name}.json")
+
+
+def pull_source_scripts(provider, local_script_configs):
+    """(scripts, default expand states) from the records a ScriptSourceProvider yields"""
+    # shared settings saved from the panel can't go back to the provider, they're kept in the local config folder
+    script_root = ScriptRoot("", get_source_config_path(provider.name), get_local_config_path())
+    source_script_configs = config_journal.read_config(script_root.shared_config_path).get(k.script_configs, {})
+
+    scripts = []
+    default_expand_states = {provider.name: True}
+    for record in provider.iter_scripts():
+        display_relative_dir = f"{provider.name}/{record.relative_dir}" if record.relative_dir else provider.name
+        for ancestor_dir in get_dir_ancestors(display_relative_dir):
+            default_expand_states.setdefault(ancestor_dir, False)
+
+        # the path is absolute, so it doubles as the config key
+        script_inst = Script(script_root, record.path, display_relative_dir)
+        config_key = script_inst.get_config_key()
+        script_inst.update_from_dict(record.config)
+        script_inst.update_from_dict(source_script_configs.get(config_key, {}))
+        script_inst.update_from_dict(local_script_configs.get(config_key, {}))
+
+        scripts.append(script_inst)
+
+    return scripts, default_expand_states
+
+
+def find_favorite_scripts(catalog):
+    config_json = {}
+    local_config_path = get_local_config_path()
+    if os.path.exists(local_config_path):
+        with open(local_config_path, "r") as fp:
+            config_json = json.load(fp)
+
+    # get script instances for each favorite
+    favorite_scripts = []
+    for favorite in config_json.get(k.favorites, []):
+        script = catalog.scripts_by_config_key.get(favorite)
+        if script:
+            script.is_favorited = True
+            favorite_scripts.append(script)
+    return favorite_scripts
+
+
 class ScriptHandler():
     def __init__(self):
-        self.active_root_dirs = []
-        self.scripts = {}
-        self.favorite_scripts = []
+        self.catalog = Catalog()
         self.expanded_dirs = {}
-        self.primary_dir = None
+        self.database : catalog_database.CatalogDatabase = None
+        self.usage = usage_tracker.UsageTracker()
 
-    def populate_scripts(self, root_dirs):
-        self.scripts = {}
-        self.favorite_scripts = []
-        self.primary_dir = None
-        self.active_root_dirs = root_dirs
-        # don't reset self.expanded_dirs so we can keep the state when refreshing
+        self.is_refreshing = False
+        self._refresh_thread = None
+        self._pending_catalog = None
 
-        local_config_path = get_local_config_path()
+        # root dirs of a forced refresh requested while another refresh was running, started once that one is published
+        self._pending_forced_root_dirs = None
 
-        for root_dir in root_dirs:
-            if self.primary_dir is None:
-                self.primary_dir = root_dir
-            
-            scripts_root_path = os.path.join(root_dir, "scripts")
-            if not os.path.exists(scripts_root_path):
-                print(f"failed to find: {scripts_root_path}")
-                continue
-            
-            shared_config_path = os.path.join(root_dir, "shared_config.json")
-            combined_configs = merge_jsons((shared_config_path, local_config_path))
+        # catalog the database rows currently match, queries only go to the database while that's self.catalog
+        self._database_catalog = None
+        self._database_thread = None
+        self._database_thread_lock = threading.Lock()
+
+        # catalog shared with the other blender instances on this machine, None when every instance scans on its own
+        self.shared_catalog : shared_catalog.SharedCatalogCache = None
+
+        # cache folder: catalog url, for the root dirs that get synced from an http catalog
+        self.remote_roots = {}
 
-            # recalculate folder name since blender chucks an extra slash on a folder path
-            root_dir_name = os.path.basename(os.path.dirname(scripts_root_path))
+        # ScriptSourceProviders from the extension, their scripts are added on top of the root dirs
+        self.script_sources = []
 
-            # if there's only one root path can skip a level of indendation in the UI
-            if len(root_dirs) == 1:
-                root_dir_name = ""
+        # provider name: (version token, scripts by path, default expand states) of the last successful pull
+        self._source_cache = {}
 
-            for parent_dir, _, files in os.walk(scripts_root_path):
-                relative_dir = os.path.relpath(parent_dir, scripts_root_path).replace("\\", "/")
+        # provider name: version token of the last pull, even if it failed, so a broken source isn't retried until it changes
+        self._pulled_source_tokens = {}
 
-                # calculate relative_dir for grouping display
-                default_expand_state = False
-                display_relative_dir = f"{root_dir_name}/{relative_dir}" if root_dir_name else relative_dir
-                if relative_dir == ".":
-                    display_relative_dir = root_dir_name
-                    default_expand_state = True
+        # macro name: list of config keys, loaded when first needed
+        self.macros = None
 
-                # set default expand state of folders.
-                if not self.expanded_dirs.get(display_relative_dir):
-                    self.expanded_dirs[display_relative_dir] = default_expand_state
+        # relative dirs of the current catalog whose config shard has been applied
+        self._loaded_shard_dirs = set()
 
-                for script_file_name in sorted(files):
-                    if ".py" not in script_file_name:
-                        continue
+        # filter text: SearchResult for the last few searches, so typing and backspacing stays cheap
+        self._search_results = collections.OrderedDict()
+        self._search_results_key = None
 
-                    script_file_path = os.path.join(parent_dir, script_file_name)
-                    script_relative_path = os.path.relpath(script_file_path, root_dir)
+        # tags toggled on in the panel, like expanded_dirs this is kept across refreshes
+        self.active_tags = set()
 
-                    script_inst = Script()
-                    script_inst.path = script_file_path
-                    script_inst.label = get_default_label(script_file_path)
-                    script_inst.relative_dir = display_relative_dir
-                    script_inst.relative_path = script_relative_path
-                    script_inst.shared_config_path = shared_config_path
-                    script_inst.local_config_path = local_config_path
+        # built from every script once tags are filtered on, dropped whenever a script changes
+        self._tag_index : TagIndex = None
 
-                    # update any extra settings that have been saved in a config
-                    script_config = combined_configs.get(k.script_configs, {}).get(script_inst.get_config_key(), {})
-                    script_inst.update_from_dict(script_config)
+        # (filter text, active tags): (text search result, tag index, filtered result)
+        self._facet_results = collections.OrderedDict()
 
-                    self.scripts[script_file_path] = script_inst
+        # config key: last import profile, loaded when first needed
+        self.import_reports = None
 
-        self.update_favorites()
+        self.search_content = False
+        self.content_index = script_content_index.ContentIndex()
+        self._content_index_thread = None
+
+        # script path: syntax error message
+        self.script_errors = {}
+        self._validation_thread = None
+        self._pending_script_errors = None
+
+    @property
+    def active_root_dirs(self):
+        return self.catalog.root_dirs
+
+    @property
+    def scripts(self):
+        return self.catalog.scripts
+
+    @property
+    def favorite_scripts(self):
+        return self.catalog.favorite_scripts
+
+    @property
+    def primary_dir(self):
+        return self.catalog.primary_dir
+
+    def populate_scripts(self, root_dirs, force_scan=False):
+        self.set_catalog(self.get_catalog(root_dirs, force_scan))
+
+    def get_catalog(self, root_dirs, force_scan=False):
+        """Scans the root dirs, unless another instance already did, and adds the scripts of the script sources"""
+        if self.shared_catalog is None:
+            catalog = build_catalog(root_dirs)
+        else:
+            catalog = self.shared_catalog.get_catalog(root_dirs, build_catalog, get_catalog_config_paths(root_dirs), force_scan)
+        return self.add_source_scripts(catalog)
+
+    def pull_script_sources(self):
+        """[(scripts, default expand states)] of each script source, pulled again only when its version token changed"""
+        local_script_configs = None
+        source_results = []
+
+        for provider in self.script_sources:
+            version_token = provider.get_version_token()
+            cached = self._source_cache.get(provider.name)
+
+            if cached is None or version_token is None or cached[0] != version_token:
+                self._pulled_source_tokens[provider.name] = version_token
+                if local_script_configs is None:
+                    local_script_configs = config_journal.read_config(get_local_config_path()).get(k.script_configs, {})
+
+                try:
+                    with script_panel_metrics.timed("script_source_pull_seconds", "duration of pulling the scripts of a script source"):
+                        scripts, default_expand_states = pull_source_scripts(provider, local_script_configs)
+                except Exception:
+                    log.exception(f"Failed to get scripts from {provider.name}")
+                else:
+                    cached = (version_token, scripts, default_expand_states)
+                    self._source_cache[provider.name] = cached
+            else:
+                script_panel_metrics.inc("script_source_hits", description="script sources reused since their version token didn't change")
+
+            if cached is not None:
+                source_results.append(cached[1:])
+
+        return source_results
+
+    def add_source_scripts(self, catalog : Catalog):
+        if not self.script_sources:
+            return catalog
+
+        scripts = list(catalog.scripts.values())
+        default_expand_states = dict(catalog.default_expand_states)
+        for source_scripts, source_expand_states in self.pull_script_sources():
+            scripts.extend(source_scripts)
+            default_expand_states.update(source_expand_states)
+
+        catalog = Catalog(catalog.root_dirs, scripts, (), catalog.primary_dir, default_expand_states, catalog.dir_mtimes, catalog.shard_paths)
+        return catalog.with_favorites(find_favorite_scripts(catalog))
+
+    def script_sources_changed(self):
+        """True when a script source has a new version token since it was last pulled"""
+        if self.is_refreshing:
+            return False
+
+        for provider in self.script_sources:
+            version_token = provider.get_version_token()
+            if version_token is not None and version_token != self._pulled_source_tokens.get(provider.name):
+                return True
+        return False
+
+    def set_shared_catalog_enabled(self, state):
+        if state and self.shared_catalog is None:
+            self.shared_catalog = shared_catalog.SharedCatalogCache(get_local_config_dir(), (Script.__slots__, ScriptRoot.__slots__, ScriptMap.__slots__))
+        elif not state:
+            self.shared_catalog = None
+
+    def shared_catalog_changed(self):
+        """True when another instance published a catalog for the current root dirs"""
+        if self.shared_catalog is None or self.is_refreshing:
+            return False
+        return self.shared_catalog.has_changed(self.active_root_dirs)
+
+    def sync_remote_roots(self, root_dirs):
+        """Sync the remote roots among root_dirs into their cache folders, True when any file changed"""
+        has_changes = False
+        for root_dir in root_dirs:
+            url = self.remote_roots.get(root_dir)
+            if url is None:
+                continue
+            with script_panel_metrics.timed("remote_sync_seconds", "duration of syncing a remote catalog"):
+                sync_result = remote_catalog.sync_remote_root(url, root_dir)
+            if sync_result.has_changes:
+                log.info(f"Synced {url}: {len(sync_result.downloaded)} downloaded, {len(sync_result.removed)} removed")
+                has_changes = True
+        return has_changes
+
+    def set_database_enabled(self, state):
+        if state and self.database is None:
+            self.database = catalog_database.CatalogDatabase(catalog_database.get_database_path(get_local_config_dir()))
+            self.start_database_sync()
+
+        elif not state and self.database is not None:
+            database = self.database
+            self.database = None
+            self._database_catalog = None
+            database.close()
+
+    def is_database_ready(self):
+        return self.database is not None and self._database_catalog is self.catalog
+
+    def start_database_sync(self):
+        """Bring the database in line with the current catalog on a worker thread"""
+        if self.database is None:
+            return False
+
+        with self._database_thread_lock:
+            # a running sync checks for a newer catalog before it stops
+            if self._database_thread is not None:
+                return False
+
+            self._database_thread = threading.Thread(target=self._sync_database, args=(self.database,), daemon=True)
+            self._database_thread.start()
+        return True
+
+    def _sync_database(self, database : catalog_database.CatalogDatabase):
+        try:
+            while True:
+                with self._database_thread_lock:
+                    catalog = self.catalog
+                    if database is not self.database or catalog is self._database_catalog:
+                        self._database_thread = None
+                        return
+
+                with script_panel_metrics.timed("database_sync_seconds", "duration of syncing the catalog database"):
+                    written_count = database.sync_catalog(catalog.scripts_by_dir, get_dir_sync_keys(catalog))
+                script_panel_metrics.inc("database_rows_written", written_count, "catalog database rows written by syncs")
+                self._database_catalog = catalog
+
+        except Exception:
+            log.exception("Syncing the catalog database failed")
+            with self._database_thread_lock:
+                self._database_thread = None
+
+    def set_catalog(self, catalog : Catalog):
+        # don't reset self.expanded_dirs so we can keep the state when refreshing
+        for rel_dir, default_expand_state in catalog.default_expand_states.items():
+            if not self.expanded_dirs.get(rel_dir):
+                self.expanded_dirs[rel_dir] = default_expand_state
+
+        # single reference swap, so anything reading the handler sees either the old or the new catalog
+        self.catalog = catalog
+        self.macros = None
+        self._loaded_shard_dirs = set()
+        self._tag_index = None
+        self.start_database_sync()
+
+    def load_config_shards(self, relative_dirs=None):
+        """Apply the config shards of these folders, or of every folder when None. Each shard is only read once per catalog."""
+        shard_paths = self.catalog.shard_paths
+        if len(self._loaded_shard_dirs) == len(shard_paths):
+            return
+
+        if relative_dirs is None:
+            relative_dirs = shard_paths.keys()
+        unloaded_dirs = [relative_dir for relative_dir in relative_dirs if relative_dir in shard_paths and relative_dir not in self._loaded_shard_dirs]
+        if not unloaded_dirs:
+            return
+
+        # local settings still go on top of the shared ones
+        local_script_configs = config_journal.read_config(get_local_config_path()).get(k.script_configs, {})
+
+        changed_scripts = []
+        script : Script
+        for relative_dir in unloaded_dirs:
+            self._loaded_shard_dirs.add(relative_dir)
+            try:
+                shard_script_configs = config_shards.read_shard(shard_paths[relative_dir])
+            except ValueError:
+                log.warning(f"Ignoring broken config shard: {shard_paths[relative_dir]}")
+                continue
+            script_panel_metrics.inc("config_shards_loaded", description="per-folder config shards read")
+
+            for script in self.catalog.scripts_by_dir.get(relative_dir, ()):
+                config_key = script.get_config_key()
+                if config_key not in shard_script_configs:
+                    continue
+
+                script.update_from_dict(shard_script_configs[config_key])
+                script.update_from_dict(local_script_configs.get(config_key, {}))
+                changed_scripts.append(script)
+
+        if changed_scripts:
+            self.on_scripts_changed(changed_scripts)
+
+    def load_script_shards(self, scripts):
+        self.load_config_shards({script.relative_dir for script in scripts})
+
+    def start_background_refresh(self, root_dirs, force_scan=False):
+        """
+        Build a new catalog on a worker thread, publish it with publish_background_refresh().
+        A forced refresh requested while one is running follows right after it, the running one may have read the old files.
+        """
+        if self.is_refreshing:
+            if force_scan:
+                self._pending_forced_root_dirs = list(root_dirs)
+            return False
+
+        self.is_refreshing = True
+        self._pending_catalog = None
+        self._refresh_thread = threading.Thread(
+            target=self._build_pending_catalog,
+            args=(list(root_dirs), force_scan),
+            daemon=True,
+            )
+        self._refresh_thread.start()
+        return True
+
+    def _build_pending_catalog(self, root_dirs, force_scan):
+        try:
+            # freshly synced files aren't in the shared catalog yet
+            if self.sync_remote_roots(root_dirs):
+                force_scan = True
+            self._pending_catalog = self.get_catalog(root_dirs, force_scan)
+        except Exception:
+            log.exception("Background catalog refresh failed")
+
+    def publish_background_refresh(self):
+        """Swap in the catalog from the worker thread. Returns False while it, or a forced refresh queued behind it, is still being built."""
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return False
+
+        catalog = self._pending_catalog
+        self._refresh_thread = None
+        self._pending_catalog = None
+        self.is_refreshing = False
+
+        if catalog is not None:
+            self.set_catalog(catalog)
+
+        forced_root_dirs = self._pending_forced_root_dirs
+        if forced_root_dirs is not None:
+            self._pending_forced_root_dirs = None
+            self.start_background_refresh(forced_root_dirs, force_scan=True)
+            return False
+        return True
+
+    def start_background_validation(self):
+        """Syntax check every script in the catalog, publish with publish_background_validation()"""
+        if self._validation_thread is not None:
+            return False
+
+        self._pending_script_errors = None
+        self._validation_thread = threading.Thread(
+            target=self._validate_scripts,
+            args=(self.get_script_file_paths(),),
+            daemon=True,
+            )
+        self._validation_thread.start()
+        return True
+
+    def _validate_scripts(self, script_paths):
+        try:
+            cache_path = script_validation.get_cache_path(get_local_config_dir())
+            self._pending_script_errors = script_validation.validate_scripts(script_paths, cache_path)
+        except Exception:
+            log.exception("Background script validation failed")
+
+    def publish_background_validation(self):
+        """Returns False while the validation is still running"""
+        if self._validation_thread is not None and self._validation_thread.is_alive():
+            return False
+
+        script_errors = self._pending_script_errors
+        self._validation_thread = None
+        self._pending_script_errors = None
+
+        if script_errors is not None:
+            self.script_errors = script_errors
+        return True
+
+    def start_background_content_indexing(self):
+        """Bring the content index up to date with the catalog, without blocking"""
+        if self._content_index_thread is not None and self._content_index_thread.is_alive():
+            return False
+
+        self._content_index_thread = threading.Thread(
+            target=self._update_content_index,
+            args=(self.get_script_file_paths(),),
+            daemon=True,
+            )
+        self._content_index_thread.start()
+        return True
+
+    def _update_content_index(self, script_paths):
+        try:
+            self.content_index.update(script_paths, script_content_index.get_cache_path(get_local_config_dir()))
+        except Exception:
+            log.exception("Building the content index failed")
+
+    def get_script_file_paths(self):
+        """Paths of the scripts that are plain files, bundled scripts only exist in memory"""
+        return [path for path, script in self.scripts.items() if not script.root.is_bundle]
+
+    def get_script_error(self, script : Script):
+        return self.script_errors.get(script.path)
 
     def get_filtered_scripts(self, filter_text):
         script : Script
         filter_tokens = filter_text.split(" ")
+
+        # labels can come from any shard
+        self.load_config_shards()
+
+        # scripts whose source matches, on top of the label matches
+        content_matches = self.content_index.search(filter_text) if self.search_content and filter_text else set()
+
+        if self.is_database_ready():
+            label_match_paths = self.database.search_labels(filter_tokens)
+            for path in label_match_paths:
+                # scripts from sources that were pulled since the last sync aren't in the catalog anymore
+                script = self.scripts.get(path)
+                if script:
+                    yield script
+
+            for path in sorted(content_matches.difference(label_match_paths)):
+                script = self.scripts.get(path)
+                if script:
+                    yield script
+            return
+
         for script in self.scripts.values():
-            if all(token in script.label.lower() for token in filter_tokens):
+            if all(token in script.lower_label for token in filter_tokens):
+                yield script
+            elif content_matches and script.path in content_matches:
                 yield script
 
+    def get_search_result(self, filter_text) -> SearchResult:
+        """Cached version of get_filtered_scripts, plus match counts per folder"""
+        self.load_config_shards()
+
+        # anything that changes what matches throws the cached results away, compared by identity
+        results_key = (self.catalog, self.content_index.index if self.search_content else None)
+        if self._search_results_key is None or any(a is not b for a, b in zip(results_key, self._search_results_key)):
+            self._search_results.clear()
+            self._search_results_key = results_key
+
+        search_result = self._search_results.get(filter_text)
+        if search_result is not None:
+            self._search_results.move_to_end(filter_text)
+            return search_result
+
+        previous_result = next(reversed(self._search_results.values()), None)
+        if previous_result is not None and previous_result.filter_text and filter_text.startswith(previous_result.filter_text):
+            search_result = self._narrow_search_result(previous_result, filter_text)
+        else:
+            scripts = list(self.get_filtered_scripts(filter_text))
+            search_result = self._make_search_result(filter_text, scripts, [script.lower_label for script in scripts])
+
+        self._search_results[filter_text] = search_result
+        while len(self._search_results) > k.max_cached_searches:
+            self._search_results.popitem(last=False)
+        return search_result
+
+    def _make_search_result(self, filter_text, scripts, lower_labels):
+        dir_match_counts = {}
+        for relative_dir, match_count in collections.Counter(script.relative_dir for script in scripts).items():
+            for ancestor_dir in self.catalog.dir_ancestors.get(relative_dir, ()):
+                dir_match_counts[ancestor_dir] = dir_match_counts.get(ancestor_dir, 0) + match_count
+        return SearchResult(filter_text, scripts, lower_labels, dir_match_counts)
+
+    def get_tag_index(self) -> TagIndex:
+        if self._tag_index is None:
+            # tags can come from any shard
+            self.load_config_shards()
+            with script_panel_metrics.timed("tag_index_seconds", "duration of building the tag bitsets"):
+                self._tag_index = TagIndex(self.scripts.values())
+
+            # a tag that no script has anymore gets no toggle, it would hide every script with no way to turn it off
+            self.active_tags.intersection_update(self._tag_index.tag_bits)
+        return self._tag_index
+
+    def toggle_tag(self, tag):
+        if tag in self.active_tags:
+            self.active_tags.remove(tag)
+        else:
+            self.active_tags.add(tag)
+
+    def get_filter_result(self, filter_text, active_tags=()) -> SearchResult:
+        """Search result limited to the scripts with the active tags, the text search itself stays cached per filter text"""
+        if not active_tags:
+            return self.get_search_result(filter_text)
+
+        tag_index = self.get_tag_index()
+        text_result = self.get_search_result(filter_text) if filter_text else None
+
+        cache_key = (filter_text, frozenset(active_tags))
+        cached = self._facet_results.get(cache_key)
+        if cached is not None and cached[0] is text_result and cached[1] is tag_index:
+            return cached[2]
+
+        bits = tag_index.get_filter_bits(active_tags)
+        if text_result is not None:
+            bits &= tag_index.get_result_bits(text_result)
+        facet_result = self._make_search_result(filter_text, tag_index.get_scripts(bits), None)
+
+        self._facet_results[cache_key] = (text_result, tag_index, facet_result)
+        while len(self._facet_results) > k.max_cached_searches:
+            self._facet_results.popitem(last=False)
+        return facet_result
+
+    def _narrow_search_result(self, previous_result : SearchResult, filter_text):
+        """A longer search can only match fewer scripts, so only the previous matches get checked again"""
+        filter_tokens = filter_text.split(" ")
+        content_matches = self.content_index.search(filter_text) if self.search_content else set()
+
+        scripts = []
+        lower_labels = []
+        dir_match_counts = dict(previous_result.dir_match_counts)
+        for script, lower_label in zip(previous_result.scripts, previous_result.lower_labels):
+            if all(token in lower_label for token in filter_tokens) or (content_matches and script.path in content_matches):
+                scripts.append(script)
+                lower_labels.append(lower_label)
+                continue
+
+            for ancestor_dir in self.catalog.dir_ancestors.get(script.relative_dir, ()):
+                dir_match_counts[ancestor_dir] -= 1
+
+        return SearchResult(filter_text, scripts, lower_labels, dir_match_counts)
+
+    def get_dir_script_count(self, relative_dir):
+        return self.catalog.dir_script_counts.get(relative_dir, 0)
+
+    def get_scripts_in_dirs(self, relative_dirs):
+        self.load_config_shards(relative_dirs)
+
+        if self.is_database_ready():
+            for path in self.database.get_dir_script_paths(relative_dirs):
+                script = self.scripts.get(path)
+                if script:
+                    yield script
+            return
+
+        for relative_dir in relative_dirs:
+            yield from self.catalog.scripts_by_dir.get(relative_dir, ())
+
     def update_favorites(self):
-        self.favorite_scripts = []
+        previous_catalog = self.catalog
+        self.catalog = self.catalog.with_favorites(find_favorite_scripts(self.catalog))
+
+        # favorites aren't in the database, the rows still match
+        if self._database_catalog is previous_catalog:
+            self._database_catalog = self.catalog
+
+    def get_macros(self):
+        if self.macros is None:
+            self.macros = config_journal.read_json(get_local_config_path()).get(k.macros, {})
+        return self.macros
+
+    def set_macro(self, macro_name, config_keys):
+        """An empty list of config keys removes the macro"""
+        macros = dict(self.get_macros())
+        if config_keys:
+            macros[macro_name] = list(config_keys)
+        else:
+            macros.pop(macro_name, None)
 
-        config_json = {}
         local_config_path = get_local_config_path()
-        if os.path.exists(local_config_path):
-            with open(local_config_path, "r") as fp:
-                config_json = json.load(fp)
+        full_config_data = config_journal.read_json(local_config_path)
+        full_config_data[k.macros] = macros
+
+        os.makedirs(os.path.dirname(local_config_path), exist_ok=True)
+        with open(local_config_path, "w") as fp:
+            json.dump(full_config_data, fp, indent=2)
+
+        self.macros = macros
 
-        # get script instances for each favorite
-        for favorite in config_json.get(k.favorites, []):
-            script = self.get_script_inst_from_config_key(favorite)
+    def add_to_macro(self, macro_name, script : Script):
+        config_keys = self.get_macros().get(macro_name, [])
+        self.set_macro(macro_name, config_keys + [script.get_config_key()])
+
+    def get_macro_scripts(self, macro_name):
+        macro_scripts = []
+        for config_key in self.get_macros().get(macro_name, []):
+            script = self.get_script_inst_from_config_key(config_key)
+            if script:
+                macro_scripts.append(script)
+        self.load_script_shards(macro_scripts)
+        return macro_scripts
+
+    def _ensure_usage_loaded(self):
+        if not self.usage.is_loaded:
+            self.usage.load(usage_tracker.get_usage_path(get_local_config_dir()))
+
+    def record_script_run(self, script : Script):
+        """Cheap enough to call on every button press, nothing is written to disk here"""
+        self._ensure_usage_loaded()
+        self.usage.record(script.get_config_key())
+
+    def flush_usage(self):
+        return self.usage.flush(usage_tracker.get_usage_path(get_local_config_dir()))
+
+    def get_frequently_used_scripts(self, count):
+        self._ensure_usage_loaded()
+
+        frequent_scripts = []
+        for config_key in self.usage.get_most_used(count):
+            script = self.get_script_inst_from_config_key(config_key)
             if script:
-                script.is_favorited = True
-                self.favorite_scripts.append(script)
+                frequent_scripts.append(script)
+        self.load_script_shards(frequent_scripts)
+        return frequent_scripts
+
+    def sort_by_usage(self, scripts):
+        """Most used first, scripts that were never run keep their order"""
+        self._ensure_usage_loaded()
+        return sorted(scripts, key=lambda script: self.usage.get_rank_key(script.get_config_key()), reverse=True)
+
+    def get_usage_sorted_scripts(self, search_result : SearchResult):
+        """sort_by_usage() of the matches, kept on the search result until a script runs or usage is flushed"""
+        self._ensure_usage_loaded()
+        usage_sorted = search_result.usage_sorted
+        if usage_sorted is None or usage_sorted[0] != self.usage.version:
+            usage_sorted = (self.usage.version, self.sort_by_usage(search_result.scripts))
+            search_result.usage_sorted = usage_sorted
+        return usage_sorted[1]
+
+    def get_import_report(self, script : Script):
+        if self.import_reports is None:
+            self.import_reports = config_journal.read_json(get_import_reports_path())
+        return self.import_reports.get(script.get_config_key())
+
+    def set_import_report(self, script : Script, report):
+        """Profiling is opt in, so it's fine to write these out right away"""
+        self.get_import_report(script)
+        self.import_reports[script.get_config_key()] = report
+
+        import_reports_path = get_import_reports_path()
+        os.makedirs(os.path.dirname(import_reports_path), exist_ok=True)
+        with open(import_reports_path, "w") as fp:
+            json.dump(self.import_reports, fp, indent=2)
+
+    def on_script_changed(self, script : Script):
+        """Call after changing the display settings of a script"""
+        self.on_scripts_changed((script,))
+
+    def on_scripts_changed(self, scripts):
+        self._search_results.clear()
+        self._tag_index = None
+        if self.database is not None:
+            self.database.update_scripts(scripts)
 
     def get_favorited_scripts(self):
+        self.load_script_shards(self.favorite_scripts)
         return self.favorite_scripts
 
     def get_filtered_dirs(self, filter_text):
-        rel_dirs = set()
-        for script in self.get_filtered_scripts(filter_text):
-            rel_dirs.add(script.relative_dir)
-        return rel_dirs
+        return self.get_search_result(filter_text).matching_dirs
     
     def get_expanded_dirs(self):
         for dir, state in self.expanded_dirs.items():
             if state:
                 yield dir
 
+    def get_script_dirs(self):
+        """Relative dirs that directly contain scripts"""
+        return self.catalog.scripts_by_dir.keys()
+
     def get_all_relative_dirs(self):
         return self.expanded_dirs.keys()
 
@@ -247,26 +1309,32 @@ class ScriptHandler():
         return self.scripts.get(path)
 
     def get_script_inst_from_config_key(self, path) -> Script:
-        script : Script
-        for script in self.scripts.values():
-            if script.get_config_key() == path:
-                return script
+        return self.catalog.scripts_by_config_key.get(path)
+
+
+def get_local_config_dir():
+    override_dir = os.getenv(k.config_dir_env_var)
+    if override_dir:
+        return override_dir
+
+    # APPDATA only exists on windows, fall back to the usual config location elsewhere
+    user_config_dir = os.getenv("APPDATA") or os.getenv("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(user_config_dir, "script_panel_blender")
 
 
 def get_local_config_path():
-    return os.path.join(os.getenv('APPDATA'), "script_panel_blender", "local_panel_config.json")
+    return os.path.join(get_local_config_dir(), "local_panel_config.json")
+
+
+def get_import_reports_path():
+    return os.path.join(get_local_config_dir(), k.import_reports_file_name)
 
 
 def merge_jsons(json_paths):
     merged_output = {}
 
     for config_path in json_paths:
-        if not os.path.exists(config_path):
-            continue
-
-        with open(config_path, "r") as fp:
-            config_data = json.load(fp)
-
+        config_data = config_journal.read_config(config_path)
         merge_dicts(merged_output, config_data)
 
     return merged_output
@@ -289,4 +1357,9 @@ def get_default_label(script_path):
     return os.path.splitext(os.path.basename(script_path))[0]
 
 
+def get_lower_label(label):
+    lower_label = label.lower()
+    return label if lower_label == label else sys.intern(lower_label)
+
+
 instance = ScriptHandler()
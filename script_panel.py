@@ -1,39 +1,282 @@
 import os
 import time
-import runpy
-import subprocess
+import traceback
 
 import bpy
 
 from . import icon_manager
 from . import script_handler
+from . import script_executor
 from . import script_edit_box
 from . import script_panel_preferences
 from . import script_panel_logger
+from . import script_panel_metrics
+from . import script_panel_extension_system
 
 log = script_panel_logger.get_logger()
 
+RECENT_LOG_ENTRY_COUNT = 30
+
+# scripts with a generator run() get stepped for this many seconds per timer tick, the rest of the time blender redraws
+STEP_TIME_BUDGET = 0.03
+STEP_TIMER_INTERVAL = 0.01
+
+# seconds after register() before the first catalog load starts, drawing the panel starts it right away
+FIRST_LOAD_DELAY = 1.0
+
+LOG_LEVEL_ICONS = {
+    "ERROR": "ERROR",
+    "CRITICAL": "ERROR",
+    "WARNING": "INFO",
+    "STDERR": "CONSOLE",
+    "STDOUT": "CONSOLE",
+}
+
+first_load_started = False
+
+
+def refresh_script_handler_in_background(force_scan=False):
+    """
+    force_scan skips the catalog shared by other instances, for when the folders are known to have changed.
+    A forced refresh asked for while another one runs is started once that one is done.
+    """
+    prefs = script_panel_preferences.get_preferences()
+    script_panel_metrics.registry.enabled = prefs.collect_metrics
+    script_handler.instance.set_database_enabled(prefs.use_catalog_database)
+    script_handler.instance.set_shared_catalog_enabled(prefs.share_catalog)
+    script_handler.instance.remote_roots = prefs.get_remote_roots()
+    if not script_handler.instance.start_background_refresh(prefs.get_root_dir_paths(), force_scan):
+        return
+
+    bpy.app.timers.register(publish_background_refresh, first_interval=0.05)
+    tag_panel_redraw()
+
+
+def start_first_load():
+    """
+    Timer callback, also called by the first draw of the panel. register() only sets up classes and properties,
+    so blender starts without waiting on extensions or a scan of the root dirs.
+    """
+    global first_load_started
+    if first_load_started:
+        return None
+    first_load_started = True
 
-def refresh_script_handler():
     prefs = script_panel_preferences.get_preferences()
-    script_handler.instance.populate_scripts(prefs.get_root_dir_paths())
+    script_panel_metrics.registry.enabled = prefs.collect_metrics
+    script_handler.instance.script_sources = script_panel_extension_system.get_extension_cls().get_script_source_providers()
+    refresh_script_handler_in_background()
+    return None
+
+
+def publish_background_refresh():
+    """Timer callback, swaps in the new catalog on the main thread once it's done"""
+    if not script_handler.instance.publish_background_refresh():
+        return 0.05
+
+    tag_panel_redraw()
+    start_script_validation()
+    start_content_indexing()
+    return None
+
+
+def watch_catalog_sources():
+    """Timer callback, picks up catalogs that other blender instances scanned and new versions of script sources"""
+    if script_handler.instance.shared_catalog_changed() or script_handler.instance.script_sources_changed():
+        refresh_script_handler_in_background()
+    return 2.0
 
 
-class ScriptPanel_ExecuteScript(bpy.types.Operator):
+def start_script_validation():
+    prefs = script_panel_preferences.get_preferences()
+    if not prefs.validate_scripts:
+        return
+
+    if script_handler.instance.start_background_validation():
+        bpy.app.timers.register(publish_background_validation, first_interval=0.2)
+
+
+def start_content_indexing():
+    prefs = script_panel_preferences.get_preferences()
+    script_handler.instance.search_content = prefs.search_script_content
+    if prefs.search_script_content:
+        script_handler.instance.start_background_content_indexing()
+
+
+def publish_background_validation():
+    if not script_handler.instance.publish_background_validation():
+        return 0.2
+
+    tag_panel_redraw()
+    return None
+
+
+def flush_usage_stats():
+    """Timer callback, usage counts are only written to disk every so often"""
+    script_handler.instance.flush_usage()
+    return 30.0
+
+
+def tag_panel_redraw():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == RENDER_PT_ScriptPanel.bl_space_type:
+                area.tag_redraw()
+
+
+class ScriptExecutionMixin():
+    """Shared by the undo and no-undo execute operators, which one a button uses is set per script"""
+    target_script_path: bpy.props.StringProperty()
+
+    @classmethod
+    def description(cls, context, properties):
+        script = script_handler.instance.get_script_from_path(properties.target_script_path)
+        description = f"{script.label} - {script.tooltip}"
+
+        script_error = script_handler.instance.get_script_error(script)
+        if script_error:
+            description += f"\n\nSyntax Error: {script_error}"
+        return description
+    
+    def invoke(self, context, event):
+        return self.execute(context)
+
+    def execute(self, context):
+        prefs = script_panel_preferences.get_preferences()
+        script = script_handler.instance.get_script_from_path(self.target_script_path)
+        if script:
+            script_handler.instance.record_script_run(script)
+
+        stepper, import_report = script_executor.start_script(
+            self.target_script_path,
+            profile_imports=prefs.profile_imports,
+            reload_root_dirs=script_handler.instance.active_root_dirs if prefs.reload_helper_modules else None,
+            )
+        if import_report and script:
+            script_handler.instance.set_import_report(script, import_report)
+
+        if stepper is None:
+            return {"FINISHED"}
+
+        # without a window, e.g. in background mode, there's nothing to keep responsive
+        if context.window is None:
+            stepper.run_to_end()
+            return {"FINISHED"}
+
+        self._stepper = stepper
+        self._label = script.label if script else os.path.basename(self.target_script_path)
+        self._timer = context.window_manager.event_timer_add(STEP_TIMER_INTERVAL, window=context.window)
+        context.window_manager.modal_handler_add(self)
+        context.window_manager.progress_begin(0, 100)
+        self.update_status(context)
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        # events don't say which timer fired them, a step on another timer's tick only means an extra step
+        if event.type not in ("ESC", "TIMER"):
+            return {"PASS_THROUGH"}
+
+        is_done = False
+        try:
+            if event.type == "ESC":
+                is_done = True
+                self._stepper.cancel()
+                self.report({'WARNING'}, f"Cancelled {self._label} at {self._stepper.progress * 100:.0f}%")
+
+                # finished rather than cancelled, so what the script did so far gets an undo step
+                return {"FINISHED"}
+
+            is_done = self._stepper.step(STEP_TIME_BUDGET)
+            if is_done:
+                return {"FINISHED"}
+
+            self.update_status(context)
+            return {"RUNNING_MODAL"}
+
+        except Exception as e:
+            is_done = True
+            traceback.print_exc()
+            self.report({'ERROR'}, f"{self._label} failed: {e}")
+            return {"CANCELLED"}
+
+        finally:
+            if is_done:
+                self.stop_stepping(context)
+
+    def cancel(self, context):
+        # blender ends the operator on its own, e.g. when another file gets loaded
+        try:
+            if not self._stepper.is_finished:
+                self._stepper.cancel()
+        finally:
+            self.stop_stepping(context)
+
+    def update_status(self, context):
+        stepper : script_executor.ScriptStepper = self._stepper
+        context.window_manager.progress_update(int(stepper.progress * 100))
+        status_text = f"{self._label}: {stepper.progress * 100:.0f}%"
+        if stepper.message:
+            status_text += f" - {stepper.message}"
+        context.workspace.status_text_set(f"{status_text}    (Esc to cancel)")
+
+    def stop_stepping(self, context):
+        if self._timer is None:
+            return
+
+        context.window_manager.event_timer_remove(self._timer)
+        self._timer = None
+        context.window_manager.progress_end()
+        context.workspace.status_text_set(None)
+
+
+class ScriptPanel_ExecuteScript(ScriptExecutionMixin, bpy.types.Operator):
     bl_idname = "wm.script_panel_exec"
     bl_label = "ExecuteScript"
     bl_description = "Execute script"
     bl_options = {'REGISTER', 'UNDO'}
 
-    target_script_path: bpy.props.StringProperty()
+
+class ScriptPanel_ExecuteScriptNoUndo(ScriptExecutionMixin, bpy.types.Operator):
+    bl_idname = "wm.script_panel_exec_no_undo"
+    bl_label = "ExecuteScript"
+    bl_description = "Execute script without creating an undo step"
+    bl_options = {'REGISTER'}
+
+
+class ScriptPanel_ExecuteMacro(bpy.types.Operator):
+    bl_idname = "wm.script_panel_exec_macro"
+    bl_label = "Execute Macro"
+    bl_description = "Run every script in the macro, as a single undo step"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    macro_name: bpy.props.StringProperty()
 
     @classmethod
     def description(cls, context, properties):
-        script = script_handler.instance.get_script_from_path(properties.target_script_path)
-        return f"{script.label} - {script.tooltip}"
-    
+        macro_scripts = script_handler.instance.get_macro_scripts(properties.macro_name)
+        return " > ".join(script.label for script in macro_scripts)
+
     def execute(self, context):
-        runpy.run_path(self.target_script_path)
+        HANDLER = script_handler.instance
+
+        macro_scripts = HANDLER.get_macro_scripts(self.macro_name)
+        if not macro_scripts:
+            self.report({'WARNING'}, f"Macro has no scripts: {self.macro_name}")
+            return {"CANCELLED"}
+
+        for script in macro_scripts:
+            HANDLER.record_script_run(script)
+
+        prefs = script_panel_preferences.get_preferences()
+        step_durations = script_executor.run_scripts(
+            [script.path for script in macro_scripts],
+            reload_root_dirs=HANDLER.active_root_dirs if prefs.reload_helper_modules else None,
+            )
+
+        for script, step_duration in zip(macro_scripts, step_durations):
+            log.info(f"{self.macro_name} - {script.label}: {step_duration * 1000:.1f} ms")
+
+        self.report({'INFO'}, f"Ran {self.macro_name} in {sum(step_durations) * 1000:.1f} ms")
         return {"FINISHED"}
 
 
@@ -43,7 +286,39 @@ class ScriptPanel_Refresh(bpy.types.Operator):
     bl_description = "Refresh from disk"
 
     def execute(self, context):
-        refresh_script_handler()
+        refresh_script_handler_in_background(force_scan=True)
+        return {"FINISHED"}
+
+
+class ScriptPanel_ExportMetrics(bpy.types.Operator):
+    bl_idname = "scriptpanel.export_metrics"
+    bl_label = "Export Metrics"
+    bl_description = "Write the collected metrics as json and in the Prometheus text format to the local config folder"
+
+    def execute(self, context):
+        output_paths = script_panel_metrics.registry.export(script_handler.get_local_config_dir())
+        self.report({'INFO'}, f"Exported metrics to {', '.join(output_paths)}")
+        return {"FINISHED"}
+
+
+class ScriptPanel_DumpLog(bpy.types.Operator):
+    bl_idname = "scriptpanel.dump_log"
+    bl_label = "Save Log"
+    bl_description = "Write the recent log entries and script output to the local config folder"
+
+    def execute(self, context):
+        log_path = script_panel_logger.dump_log(script_handler.get_local_config_dir())
+        self.report({'INFO'}, f"Saved log to {log_path}")
+        return {"FINISHED"}
+
+
+class ScriptPanel_ClearLog(bpy.types.Operator):
+    bl_idname = "scriptpanel.clear_log"
+    bl_label = "Clear Log"
+    bl_description = "Remove all entries from the recent log"
+
+    def execute(self, context):
+        script_panel_logger.buffer_handler.clear()
         return {"FINISHED"}
 
 
@@ -60,6 +335,18 @@ class ScriptPanel_ToggleDirExpandState(bpy.types.Operator):
         return {"FINISHED"}
 
 
+class ScriptPanel_ToggleTag(bpy.types.Operator):
+    bl_idname = "scriptpanel.toggle_tag"
+    bl_label = "Toggle Tag"
+    bl_description = "Only show scripts with this tag. Tags of the same kind add up, different kinds narrow down"
+
+    tag: bpy.props.StringProperty()
+
+    def execute(self, context):
+        script_handler.instance.toggle_tag(self.tag)
+        return {"FINISHED"}
+
+
 class ScriptPanel_AddScript(bpy.types.Operator):
     bl_idname = "scriptpanel.add_script"
     bl_label = "Add Script"
@@ -88,7 +375,8 @@ class ScriptPanel_AddScript(bpy.types.Operator):
         with open(output_path, "w") as fp:
             fp.writelines(default_file_content)
         
-        refresh_script_handler()
+        # the button shows up once the rescan is published
+        refresh_script_handler_in_background(force_scan=True)
 
         if self.auto_open:
             open_script(output_path)
@@ -124,6 +412,7 @@ class ScriptPanel_OpenFolder(bpy.types.Operator):
 
 def open_script(script_path, external_editor_path=None):
     if external_editor_path:
+        import subprocess
         subprocess.Popen(f'{external_editor_path} "{script_path}"')
     else:
         open_script_in_blender(script_path)
@@ -189,6 +478,13 @@ class RENDER_PT_ScriptPanel(bpy.types.Panel):
     bl_options = {"HEADER_LAYOUT_EXPAND"}
 
     def draw(self, context):
+        with script_panel_metrics.timed("draw_seconds", "duration of drawing the panel"):
+            self.draw_panel(context)
+
+    def draw_panel(self, context):
+        if not first_load_started:
+            start_first_load()
+
         layout = self.layout
 
         panel_props: ScriptPanel_SceneProperties = context.scene.script_panel_props
@@ -197,17 +493,28 @@ class RENDER_PT_ScriptPanel(bpy.types.Panel):
         top_row = layout.row()
         top_row.scale_y = 1.2
         top_row.prop(panel_props, "search_text", placeholder="search")
+        top_row.prop(panel_props, "show_tag_filters", icon="FILTER", text="")
         top_row.operator(ScriptPanel_Refresh.bl_idname, text="", icon="FILE_REFRESH")
         top_row.prop(panel_props, "edit_mode_enabled", icon="GREASEPENCIL", text="")
         filter_text = panel_props.search_text.lower()
 
+        HANDLER = script_handler.instance
+
+        # tags only filter while their toggles are shown, so nothing gets hidden without a visible reason
+        active_tags = HANDLER.active_tags if panel_props.show_tag_filters else ()
+        if panel_props.show_tag_filters:
+            self.draw_tag_filters(layout, active_tags)
+        is_filtering = bool(filter_text or active_tags)
+
+        if HANDLER.is_refreshing:
+            layout.label(text="Refreshing...", icon="SORTTIME")
+
         main_box = layout.box()
 
         if panel_props.edit_mode_enabled:
             pref_box = main_box.box()
             script_panel_preferences.draw_preferences(pref_box)
-
-        HANDLER = script_handler.instance
+            self.draw_recent_log(main_box)
 
         favorites_layout = main_box
         if prefs.favorites_layout_horizontal:
@@ -234,13 +541,39 @@ class RENDER_PT_ScriptPanel(bpy.types.Panel):
                 )
             fav_row_counter += 1
 
-        filtered_dirs = HANDLER.get_filtered_dirs(filter_text)
-        expanded_dirs = HANDLER.get_all_relative_dirs() if filter_text else list(HANDLER.get_expanded_dirs())
-        dir_boxes = self.draw_dir_boxes(main_box, filtered_dirs, expanded_dirs)
-        
+        if prefs.show_frequently_used and not is_filtering:
+            frequent_scripts = HANDLER.get_frequently_used_scripts(prefs.frequently_used_count)
+            if frequent_scripts:
+                frequent_box = main_box.box()
+                frequent_box.label(text="Frequently Used", icon="TIME")
+                for frequent_script in frequent_scripts:
+                    self.draw_script_layout(
+                        frequent_script,
+                        frequent_box,
+                        frequent_box,
+                        button_scale=prefs.button_scale,
+                        )
+
+        macros = HANDLER.get_macros()
+        if macros and not is_filtering:
+            self.draw_macros(main_box, macros, in_edit_mode=panel_props.edit_mode_enabled)
+
+        # without a search only the scripts in expanded folders will be drawn
+        if is_filtering:
+            with script_panel_metrics.timed("search_seconds", "duration of filtering scripts by the search text and tags"):
+                search_result = HANDLER.get_filter_result(filter_text, active_tags)
+
+            expanded_dirs = HANDLER.get_all_relative_dirs()
+            dir_boxes = self.draw_dir_boxes(main_box, search_result.matching_dirs, expanded_dirs, search_result.dir_match_counts)
+            visible_scripts = HANDLER.get_usage_sorted_scripts(search_result)
+        else:
+            expanded_dirs = list(HANDLER.get_expanded_dirs())
+            dir_boxes = self.draw_dir_boxes(main_box, HANDLER.get_script_dirs(), expanded_dirs)
+            visible_scripts = HANDLER.get_scripts_in_dirs(expanded_dirs)
+
         found_script = False
         script : script_handler.Script
-        for script in HANDLER.get_filtered_scripts(filter_text):
+        for script in visible_scripts:
             if script.is_favorited:
                 continue
 
@@ -263,7 +596,7 @@ class RENDER_PT_ScriptPanel(bpy.types.Panel):
 
             found_script = True
 
-        if not found_script and filter_text:
+        if not found_script and is_filtering:
             main_box.label(text="Found no scripts")
         
         if HANDLER.primary_dir:
@@ -276,7 +609,8 @@ class RENDER_PT_ScriptPanel(bpy.types.Panel):
             open_folder_op : ScriptPanel_OpenFolder = bottom_row.operator(ScriptPanel_OpenFolder.bl_idname, icon="FILE_FOLDER", text="")
             open_folder_op.dir_path = f"{HANDLER.primary_dir}/scripts"
 
-        else:
+        elif first_load_started and not HANDLER.is_refreshing:
+            # until the first catalog is in there are no root dirs yet, that's not worth a warning
             main_box.label(text="No root paths found.")
             main_box.label(text="Enter 'Edit' mode in the top right to set them.")
         
@@ -306,6 +640,11 @@ class RENDER_PT_ScriptPanel(bpy.types.Panel):
         if not has_icon and not show_label:
             operator_kwargs["icon"] = "SCRIPT"
 
+        # scripts that won't compile get flagged instead of failing when clicked
+        if script_handler.instance.get_script_error(script):
+            operator_kwargs.pop("icon_value", None)
+            operator_kwargs["icon"] = "ERROR"
+
         op_row = parent.row()
         op_row.scale_y = button_scale
         op_layout = op_row
@@ -315,8 +654,11 @@ class RENDER_PT_ScriptPanel(bpy.types.Panel):
             op_col.scale_x = button_scale
             op_layout = op_col
 
+        # skipping the undo step saves a full scene snapshot for scripts that don't change any data
+        exec_op_idname = ScriptPanel_ExecuteScript.bl_idname if script.use_undo else ScriptPanel_ExecuteScriptNoUndo.bl_idname
+
         exec_op = op_layout.operator(
-            ScriptPanel_ExecuteScript.bl_idname,
+            exec_op_idname,
             text=script.label if show_label else "",
             **operator_kwargs
             )
@@ -367,8 +709,71 @@ class RENDER_PT_ScriptPanel(bpy.types.Panel):
                 
             script_edit_box.draw_script_edit_box(editbox_parent, edit_box)
     
-    def draw_dir_boxes(self, main_box, relative_dirs, expanded_dirs = list()):
-        """Create full hierarchy of folders, and subfolders for those that are expanded"""
+    def draw_recent_log(self, main_box):
+        log_header, log_body = main_box.panel("RecentLog", default_closed=True)
+        log_header.label(text="Recent Log")
+        if not log_body:
+            return
+
+        operator_row = log_body.row(align=True)
+        operator_row.operator(ScriptPanel_DumpLog.bl_idname, icon="EXPORT")
+        operator_row.operator(ScriptPanel_ClearLog.bl_idname, icon="TRASH")
+
+        log_column = log_body.column(align=True)
+        for entry in reversed(script_panel_logger.buffer_handler.get_recent_entries(RECENT_LOG_ENTRY_COUNT)):
+            entry_text = time.strftime("%H:%M:%S", time.localtime(entry.time))
+            if entry.script_path:
+                entry_text += f" {os.path.basename(entry.script_path)}"
+            if entry.duration is not None:
+                entry_text += f" ({entry.duration * 1000:.1f} ms)"
+            message_lines = entry.message.strip().splitlines()
+            entry_text += f": {message_lines[-1] if message_lines else ''}"
+
+            log_column.label(text=entry_text, icon=LOG_LEVEL_ICONS.get(entry.level, "BLANK1"))
+
+    def draw_macros(self, main_box, macros, in_edit_mode=False):
+        macros_box = main_box.box()
+        for macro_name in sorted(macros.keys()):
+            macro_row = macros_box.row()
+            exec_op = macro_row.operator(ScriptPanel_ExecuteMacro.bl_idname, text=macro_name, icon="PLAY")
+            exec_op.macro_name = macro_name
+
+            if not in_edit_mode:
+                continue
+
+            remove_op = macro_row.operator(script_edit_box.ScriptPanel_RemoveMacro.bl_idname, text="", icon="X")
+            remove_op.macro_name = macro_name
+
+            for i, script in enumerate(script_handler.instance.get_macro_scripts(macro_name)):
+                macros_box.label(text=f"    {i + 1}. {script.label}")
+
+    def draw_tag_filters(self, layout, active_tags):
+        """A row of toggles per facet, with the number of scripts carrying each tag"""
+        tag_index = script_handler.instance.get_tag_index()
+        if not tag_index.facets:
+            layout.label(text="No tags yet, add them in the edit box of a script", icon="INFO")
+            return
+
+        tags_box = layout.box()
+        for facet, tags in tag_index.facets.items():
+            facet_row = tags_box.row()
+            facet_row.label(text=facet.capitalize())
+
+            tags_flow = facet_row.grid_flow(row_major=True, align=True)
+            for tag in tags:
+                toggle_op = tags_flow.operator(
+                    ScriptPanel_ToggleTag.bl_idname,
+                    text=f"{script_handler.get_tag_value(tag)} ({tag_index.tag_counts[tag]})",
+                    depress=tag in active_tags,
+                    )
+                toggle_op.tag = tag
+
+    def draw_dir_boxes(self, main_box, relative_dirs, expanded_dirs = list(), dir_match_counts = None):
+        """
+        Create full hierarchy of folders, and subfolders for those that are expanded.
+        Collapsed folders show how many scripts they hold, while searching every folder shows its number of matches.
+        """
+        HANDLER = script_handler.instance
         dir_boxes = {}
 
         for dir_path in sorted(relative_dirs):
@@ -392,9 +797,10 @@ class RENDER_PT_ScriptPanel(bpy.types.Panel):
 
                 if not dir_boxes.get(creation_path):
                     dir_box = parent_box.box()
+                    header_row = dir_box.row()
 
                     toggle_icon = "FILE_FOLDER" if dir_is_collapsed else "DOWNARROW_HLT"
-                    expand_toggle = dir_box.operator(
+                    expand_toggle = header_row.operator(
                         ScriptPanel_ToggleDirExpandState.bl_idname,
                         text=path_token,
                         emboss=False,
@@ -402,6 +808,13 @@ class RENDER_PT_ScriptPanel(bpy.types.Panel):
                         )
                     expand_toggle.rel_dir = creation_path
 
+                    # counts are kept up to date by the handler, nothing gets counted while drawing
+                    script_count = HANDLER.get_dir_script_count(creation_path)
+                    if dir_match_counts is not None:
+                        header_row.label(text=f"{dir_match_counts.get(creation_path, 0)}/{script_count}")
+                    elif dir_is_collapsed and script_count:
+                        header_row.label(text=str(script_count))
+
                     dir_boxes[creation_path] = dir_box
 
                 # update variable for next token
@@ -413,15 +826,22 @@ class RENDER_PT_ScriptPanel(bpy.types.Panel):
 class ScriptPanel_SceneProperties(bpy.types.PropertyGroup):
     search_text : bpy.props.StringProperty(name="", options={'TEXTEDIT_UPDATE'})
     edit_mode_enabled : bpy.props.BoolProperty()
+    show_tag_filters : bpy.props.BoolProperty(description="Filter scripts by their tags")
 
 
 CLASS_LIST = (
     ScriptPanel_ExecuteScript,
+    ScriptPanel_ExecuteScriptNoUndo,
+    ScriptPanel_ExecuteMacro,
     ScriptPanel_Refresh,
+    ScriptPanel_ExportMetrics,
+    ScriptPanel_DumpLog,
+    ScriptPanel_ClearLog,
     ScriptPanel_AddScript,
     ScriptPanel_OpenScript,
     ScriptPanel_OpenFolder,
     ScriptPanel_ToggleDirExpandState,
+    ScriptPanel_ToggleTag,
     ScriptPanel_SceneProperties,
     RENDER_PT_ScriptPanel
 )
@@ -452,6 +872,13 @@ def script_panel_right_click(self, context):
             )
         favorite_op.script_path = script_path
 
+        add_to_macro_op = layout.operator(
+            script_edit_box.ScriptPanel_AddToMacro.bl_idname,
+            text="ScriptPanel - Add To Macro",
+            icon="PLUS",
+            )
+        add_to_macro_op.script_path = script_path
+
         open_script_op = layout.operator(
             ScriptPanel_OpenScript.bl_idname,
             text="ScriptPanel - Open Script",
@@ -462,7 +889,6 @@ def script_panel_right_click(self, context):
 
 def register():
     script_panel_preferences.register()
-    icon_manager.register()
     script_edit_box.register()
 
     for cls in CLASS_LIST:
@@ -478,10 +904,31 @@ def register():
     draw_funcs = rcmenu._dyn_ui_initialize()
     draw_funcs.append(script_panel_right_click)
 
-    refresh_script_handler()
+    bpy.app.timers.register(start_first_load, first_interval=FIRST_LOAD_DELAY, persistent=True)
+    bpy.app.timers.register(flush_usage_stats, first_interval=30.0, persistent=True)
+    bpy.app.timers.register(watch_catalog_sources, first_interval=2.0, persistent=True)
 
 
 def unregister():
+    global first_load_started
+    first_load_started = False
+
+    if bpy.app.timers.is_registered(start_first_load):
+        bpy.app.timers.unregister(start_first_load)
+
+    if bpy.app.timers.is_registered(publish_background_refresh):
+        bpy.app.timers.unregister(publish_background_refresh)
+
+    if bpy.app.timers.is_registered(publish_background_validation):
+        bpy.app.timers.unregister(publish_background_validation)
+
+    if bpy.app.timers.is_registered(watch_catalog_sources):
+        bpy.app.timers.unregister(watch_catalog_sources)
+
+    if bpy.app.timers.is_registered(flush_usage_stats):
+        bpy.app.timers.unregister(flush_usage_stats)
+    script_handler.instance.flush_usage()
+
     rcmenu = getattr(bpy.types, "WM_MT_button_context", None)
     if rcmenu is not None:
         rcmenu = WM_MT_button_context
@@ -0,0 +1,565 @@
+"""
+Command line access to the script handler, for running outside of blender.
+
+    python -m script_panel_blender stats D:/studio_scripts
+    python -m script_panel_blender validate-config D:/studio_scripts
+    python -m script_panel_blender bench D:/studio_scripts --query "export fbx"
+"""
+import os
+import time
+import argparse
+import itertools
+import http.server
+
+from . import script_handler
+from . import config_journal
+from . import config_shards
+from . import script_bundles
+from . import catalog_manifest
+from . import remote_catalog
+from . import script_validation
+from . import script_content_index
+from . import script_panel_metrics
+
+k = script_handler.Constants
+
+
+def get_catalog(args):
+    start_time = time.perf_counter()
+    catalog = script_handler.build_catalog(args.root_dirs)
+    return catalog, time.perf_counter() - start_time
+
+
+def load_all_config_shards(catalog):
+    """The panel reads shards as folders get shown, here everything is needed right away"""
+    handler = script_handler.ScriptHandler()
+    handler.set_catalog(catalog)
+    handler.load_config_shards()
+
+
+def cmd_scan(args):
+    catalog, _ = get_catalog(args)
+    load_all_config_shards(catalog)
+
+    script : script_handler.Script
+    for script in catalog.scripts.values():
+        print(f"{script.relative_dir or '.'}\t{script.label}\t{script.path}")
+    return 0
+
+
+def cmd_stats(args):
+    catalog, scan_duration = get_catalog(args)
+    load_all_config_shards(catalog)
+
+    configured_scripts = [script for script in catalog.scripts.values() if script.to_dict()]
+
+    print(f"root dirs:          {len(catalog.root_dirs)}")
+    print(f"scripts:            {len(catalog.scripts)}")
+    print(f"folders:            {len(catalog.default_expand_states)}")
+    print(f"configured scripts: {len(configured_scripts)}")
+    print(f"favorites:          {len(catalog.favorite_scripts)}")
+    print(f"scan time:          {scan_duration * 1000:.1f} ms")
+    return 0
+
+
+def cmd_validate_config(args):
+    problem_count = 0
+
+    for root_dir in args.root_dirs:
+        shared_config_path = os.path.join(root_dir, "shared_config.json")
+
+        for config_path in [shared_config_path] + list(config_shards.iter_shard_paths(root_dir)):
+            problem_count += validate_config_file(root_dir, config_path)
+
+    print(f"{problem_count} problem(s) found")
+    return 1 if problem_count else 0
+
+
+def validate_config_file(root_dir, config_path):
+    """Prints the problems of a shared config or config shard, returns how many there were"""
+    try:
+        config_data = config_journal.read_config(config_path)
+    except ValueError as e:
+        print(f"{config_path}: not valid json ({e})")
+        return 1
+
+    problem_count = 0
+    for config_key, script_config in config_data.get(k.script_configs, {}).items():
+        if not isinstance(script_config, dict):
+            print(f"{config_path}: '{config_key}' is not a dictionary")
+            problem_count += 1
+            continue
+
+        if not os.path.isfile(os.path.join(root_dir, config_key)):
+            print(f"{config_path}: '{config_key}' does not exist on disk")
+            problem_count += 1
+
+        icon_path = script_config.get("icon_path")
+        if icon_path and not os.path.isfile(icon_path):
+            print(f"{config_path}: '{config_key}' icon not found: {icon_path}")
+            problem_count += 1
+
+    return problem_count
+
+
+def cmd_shard_config(args):
+    for root_dir in args.root_dirs:
+        shard_count = config_shards.migrate_root(root_dir)
+        print(f"{root_dir}: moved script configs into {shard_count} shard(s) under {config_shards.get_shards_dir(root_dir)}")
+    return 0
+
+
+def stress_config_worker(config_path, worker_index, edit_count):
+    """Runs in its own process, every edit gets a key of its own so each one can be checked for afterwards"""
+    for i in range(edit_count):
+        config_journal.append_change(config_path, k.script_configs, f"worker_{worker_index}/script_{i}.py", {"label": f"{worker_index}-{i}"})
+
+        # the same key from every worker, whichever edit lands last wins
+        config_journal.append_change(config_path, k.script_configs, "shared/script.py", {"label": f"{worker_index}-{i}"})
+
+
+def cmd_stress_config(args):
+    """Many processes appending to one shared config at once, then check that no edit got lost"""
+    import shutil
+    import tempfile
+    import multiprocessing
+    import concurrent.futures
+
+    test_dir = tempfile.mkdtemp(prefix="script_panel_stress_", dir=args.dir)
+    config_path = os.path.join(test_dir, "shared_config.json")
+    try:
+        start_time = time.perf_counter()
+        mp_context = multiprocessing.get_context("spawn")
+        with concurrent.futures.ProcessPoolExecutor(args.processes, mp_context=mp_context) as executor:
+            futures = [executor.submit(stress_config_worker, config_path, worker_index, args.edits) for worker_index in range(args.processes)]
+            for future in futures:
+                future.result()
+        duration = time.perf_counter() - start_time
+
+        # once through the journal like the panel reads it, once folded into the snapshot
+        lost_count = 0
+        for read_name, script_configs in (
+                ("journal", config_journal.read_config(config_path).get(k.script_configs, {})),
+                ("compacted", compact_and_read(config_path).get(k.script_configs, {}))):
+            for worker_index in range(args.processes):
+                for i in range(args.edits):
+                    config_key = f"worker_{worker_index}/script_{i}.py"
+                    if script_configs.get(config_key) != {"label": f"{worker_index}-{i}"}:
+                        print(f"{read_name}: lost edit {config_key}")
+                        lost_count += 1
+
+            last_labels = {f"{worker_index}-{args.edits - 1}" for worker_index in range(args.processes)}
+            if script_configs.get("shared/script.py", {}).get("label") not in last_labels:
+                print(f"{read_name}: shared/script.py doesn't end with the last edit of a worker: {script_configs.get('shared/script.py')}")
+                lost_count += 1
+
+        # every edit appends twice, once to its own key and once to the shared one
+        append_count = args.processes * args.edits * 2
+        print(f"{args.processes} processes x {args.edits} edits (x2 appends): {lost_count} lost ({duration * 1000:.0f} ms, {append_count / duration:.0f} appends/s)")
+        return 1 if lost_count else 0
+
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
+
+
+def compact_and_read(config_path):
+    config_journal.compact(config_path)
+    return config_journal.read_json(config_path)
+
+
+def cmd_pack_bundle(args):
+    start_time = time.perf_counter()
+    file_count = script_bundles.pack_root(args.root_dir, args.bundle_path)
+    print(f"{args.bundle_path}: packed {file_count} files ({(time.perf_counter() - start_time) * 1000:.1f} ms)")
+    return 0
+
+
+def cmd_bench(args):
+    scan_durations = []
+    catalog = None
+    for _ in range(args.repeat):
+        catalog, scan_duration = get_catalog(args)
+        scan_durations.append(scan_duration)
+
+    handler = script_handler.ScriptHandler()
+    handler.set_catalog(catalog)
+
+    search_durations = []
+    match_count = 0
+    for _ in range(args.repeat):
+        start_time = time.perf_counter()
+        match_count = len(list(handler.get_filtered_scripts(args.query.lower())))
+        search_durations.append(time.perf_counter() - start_time)
+
+    print(f"scripts: {len(catalog.scripts)}")
+    print_durations("populate_scripts", scan_durations)
+    print_durations(f"search '{args.query}' ({match_count} matches)", search_durations)
+
+    if args.tags:
+        start_time = time.perf_counter()
+        handler.get_tag_index()
+        print(f"tag index: {(time.perf_counter() - start_time) * 1000:.2f} ms")
+
+        # the text search is cached by the panel while typing, so only the first run pays for it
+        facet_durations = []
+        for _ in range(args.repeat):
+            start_time = time.perf_counter()
+            match_count = len(handler.get_filter_result(args.query.lower(), args.tags).scripts)
+            facet_durations.append(time.perf_counter() - start_time)
+            handler._facet_results.clear()
+        print_durations(f"search '{args.query}' with tags {', '.join(args.tags)} ({match_count} matches)", facet_durations)
+
+    if args.memory:
+        print_catalog_memory(args)
+    return 0
+
+
+def print_catalog_memory(args):
+    """What a catalog costs while it's alive, and its scripts in the current and earlier layouts. Measured with tracemalloc so it's slow."""
+    import gc
+    import tracemalloc
+
+    tracemalloc.start()
+    catalog, _ = get_catalog(args)
+    catalog_size, peak_size = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    script_count = max(1, len(catalog.scripts))
+    print(f"catalog memory: {catalog_size / 2 ** 20:.1f} MB, {catalog_size / script_count:.0f} bytes per script (peak while scanning {peak_size / 2 ** 20:.1f} MB)")
+
+    # every layout is built again from what they all share, with the scanned catalog gone so nothing else holds on to their strings
+    records = [(script.root, script.relative_path, script.relative_dir) for script in catalog.scripts.values()]
+    del catalog
+
+    layouts = (
+        ("__dict__ per script, keyed by path", lambda: {script.path: script for script in (LegacyScript(*record) for record in records)}),
+        ("slots, keyed by path", lambda: {script.path: script for script in (script_handler.Script(*record) for record in records)}),
+        ("slots, ScriptMap (current)", lambda: script_handler.ScriptMap(script_handler.Script(*record) for record in records)),
+        )
+
+    print("scripts by layout:")
+    first_size = None
+    for layout_name, build_scripts in layouts:
+        gc.collect()
+        tracemalloc.start()
+        scripts = build_scripts()
+        scripts_size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del scripts
+
+        first_size = first_size or scripts_size
+        print(f"  {layout_name}: {scripts_size / 2 ** 20:.1f} MB, {scripts_size / script_count:.0f} bytes per script ({scripts_size / first_size:.0%})")
+
+
+class LegacyScript():
+    """How a Script was stored before it had slots, only built for the memory comparison of bench --memory"""
+    def __init__(self, script_root, relative_path, relative_dir):
+        self.path = os.path.join(script_root.root_dir, relative_path)
+        self.label = script_handler.get_default_label(relative_path)
+        self.tooltip = ""
+        self.icon_name = ""
+        self.icon_path = ""
+        self.relative_dir = relative_dir
+        self.relative_path = relative_path
+        self.local_config_path = script_root.local_config_path
+        self.shared_config_path = script_root.shared_config_path
+        self.is_favorited = False
+
+
+def cmd_publish_manifest(args):
+    for root_dir in args.root_dirs:
+        manifest = catalog_manifest.write_manifest(root_dir)
+        print(f"{catalog_manifest.get_manifest_path(root_dir)}: {len(manifest['dirs'])} folders")
+    return 0
+
+
+def cmd_verify_manifest(args):
+    stale_count = 0
+    for root_dir in args.root_dirs:
+        manifest = catalog_manifest.load_manifest(root_dir)
+        if manifest is None:
+            print(f"{root_dir}: no manifest")
+            stale_count += 1
+            continue
+
+        stale_dirs = catalog_manifest.get_stale_dirs(root_dir, manifest)
+        if catalog_manifest.get_shared_config(manifest, os.path.join(root_dir, "shared_config.json")) is None:
+            print(f"{root_dir}: shared config changed since publishing")
+            stale_count += 1
+
+        for stale_dir in stale_dirs:
+            print(f"{root_dir}: folder changed since publishing: {stale_dir}")
+        stale_count += len(stale_dirs)
+
+    print(f"{stale_count} stale entries found")
+    return 1 if stale_count else 0
+
+
+def cmd_publish_remote(args):
+    for root_dir in args.root_dirs:
+        manifest = remote_catalog.write_remote_manifest(root_dir)
+        print(f"{os.path.join(root_dir, remote_catalog.k.manifest_name)}: {len(manifest['files'])} files")
+    return 0
+
+
+def cmd_sync_remote(args):
+    cache_dir = args.cache_dir or remote_catalog.get_cache_dir(script_handler.get_local_config_dir(), args.url)
+
+    start_time = time.perf_counter()
+    sync_result = remote_catalog.sync_remote_root(args.url, cache_dir, args.workers)
+    duration = time.perf_counter() - start_time
+
+    if sync_result.offline:
+        print(f"{args.url}: unreachable, {cache_dir} left as it was")
+        return 1
+
+    if sync_result.not_modified:
+        print(f"{args.url}: not modified ({duration * 1000:.1f} ms)")
+    else:
+        print(f"{args.url}: {len(sync_result.downloaded)} downloaded, {len(sync_result.removed)} removed into {cache_dir} ({duration * 1000:.1f} ms)")
+    return 0
+
+
+def cmd_check_remote(args):
+    """
+    Serve a copy of a root dir with http.server and run it through a full sync, a 304, changed and removed
+    files and an unreachable server, checking the cache folder after each step
+    """
+    import shutil
+    import tempfile
+    import threading
+    import functools
+
+    test_dir = tempfile.mkdtemp(prefix="script_panel_remote_")
+    served_dir = os.path.join(test_dir, "served", "studio_scripts")
+    cache_dir = os.path.join(test_dir, "cache", "studio_scripts")
+    try:
+        if args.root_dir:
+            shutil.copytree(args.root_dir, served_dir)
+        else:
+            for i in range(20):
+                write_text_file(os.path.join(served_dir, "scripts", f"folder_{i % 4}", f"script_{i}.py"), f"print({i})\n")
+            write_text_file(os.path.join(served_dir, "shared_config.json"), "{}")
+
+        # keep alive like a real file server, the sync reuses its connections
+        handler_cls = functools.partial(RemoteCheckRequestHandler, directory=os.path.dirname(served_dir))
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler_cls)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/studio_scripts/"
+
+        failures = []
+
+        # http.server only sends Last-Modified in whole seconds and the check runs faster than that,
+        # so every publish moves the manifest mtime a few seconds ahead
+        publish_times = itertools.count(int(time.time()), 2)
+
+        def check_step(step_name, sync_result, is_expected):
+            is_matching = is_cache_matching(served_dir, cache_dir)
+            status = "ok" if is_expected and is_matching else "FAILED"
+            print(f"{step_name}: {status}, {len(sync_result.downloaded)} downloaded, {len(sync_result.removed)} removed, "
+                  f"not modified {sync_result.not_modified}, offline {sync_result.offline}")
+            if status != "ok":
+                failures.append(step_name)
+
+        manifest = publish_remote_check(served_dir, next(publish_times))
+        result = remote_catalog.sync_remote_root(url, cache_dir, args.workers)
+        check_step("full sync", result, len(result.downloaded) == len(manifest["files"]) and not result.offline)
+
+        result = remote_catalog.sync_remote_root(url, cache_dir, args.workers)
+        check_step("unchanged", result, result.not_modified)
+
+        added_path = os.path.join(served_dir, "scripts", "remote_check_added.py")
+        write_text_file(added_path, "print('added')\n")
+        publish_remote_check(served_dir, next(publish_times))
+        result = remote_catalog.sync_remote_root(url, cache_dir, args.workers)
+        check_step("added file", result, result.downloaded == ["scripts/remote_check_added.py"] and not result.removed)
+
+        write_text_file(added_path, "print('changed')\n")
+        publish_remote_check(served_dir, next(publish_times))
+        result = remote_catalog.sync_remote_root(url, cache_dir, args.workers)
+        check_step("changed file", result, result.downloaded == ["scripts/remote_check_added.py"] and not result.removed)
+
+        os.remove(added_path)
+        publish_remote_check(served_dir, next(publish_times))
+        result = remote_catalog.sync_remote_root(url, cache_dir, args.workers)
+        check_step("removed file", result, result.removed == ["scripts/remote_check_added.py"] and not result.downloaded)
+
+        server.shutdown()
+        server.server_close()
+        result = remote_catalog.sync_remote_root(url, cache_dir, args.workers)
+        check_step("server down", result, result.offline)
+
+        return 1 if failures else 0
+
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
+
+
+class RemoteCheckRequestHandler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # without this small responses on a kept alive connection wait for a delayed ack
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def publish_remote_check(served_dir, publish_time):
+    manifest = remote_catalog.write_remote_manifest(served_dir)
+    manifest_path = os.path.join(served_dir, remote_catalog.k.manifest_name)
+    os.utime(manifest_path, (publish_time, publish_time))
+    return manifest
+
+
+def is_cache_matching(served_dir, cache_dir):
+    """Every file of the remote manifest is in the cache folder with the same content, and nothing else"""
+    served_names = set(remote_catalog.iter_root_files(served_dir))
+    cached_names = set(remote_catalog.iter_root_files(cache_dir)) if os.path.isdir(cache_dir) else set()
+    if served_names != cached_names:
+        return False
+    return all(
+        remote_catalog.get_file_hash(os.path.join(served_dir, *name.split("/"))) == remote_catalog.get_file_hash(os.path.join(cache_dir, *name.split("/")))
+        for name in served_names
+        )
+
+
+def write_text_file(file_path, text):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w") as fp:
+        fp.write(text)
+
+
+def cmd_validate_scripts(args):
+    catalog, _ = get_catalog(args)
+
+    start_time = time.perf_counter()
+    cache_path = script_validation.get_cache_path(script_handler.get_local_config_dir())
+    script_paths = [script_path for script_path, script in catalog.scripts.items() if not script.root.is_bundle]
+    script_errors = script_validation.validate_scripts(script_paths, cache_path, args.workers)
+    duration = time.perf_counter() - start_time
+
+    for script_path, script_error in sorted(script_errors.items()):
+        print(f"{script_path}: {script_error}")
+
+    print(f"{len(script_errors)} of {len(catalog.scripts)} scripts have errors ({duration * 1000:.1f} ms)")
+    return 1 if script_errors else 0
+
+
+def cmd_index_content(args):
+    catalog, _ = get_catalog(args)
+
+    cache_path = script_content_index.get_cache_path(script_handler.get_local_config_dir())
+    script_paths = [script_path for script_path, script in catalog.scripts.items() if not script.root.is_bundle]
+
+    start_time = time.perf_counter()
+    content_index = script_content_index.ContentIndex()
+    read_count = content_index.update(script_paths, cache_path)
+    duration = time.perf_counter() - start_time
+
+    hit_count = len(content_index.documents) - read_count
+    print(f"{cache_path}: {len(content_index.documents)} scripts indexed, {hit_count} cache hits, {read_count} misses ({duration * 1000:.1f} ms)")
+
+    if args.query:
+        print(f"search '{args.query}': {len(content_index.search(args.query))} matches")
+
+    stale_paths = script_content_index.get_stale_paths(cache_path, content_index.documents)
+    for stale_path in stale_paths:
+        print(f"{stale_path}: not in the cache or changed since it was written")
+
+    print(f"{len(stale_paths)} stale entries found")
+    return 1 if stale_paths else 0
+
+
+def print_durations(name, durations):
+    durations = sorted(durations)
+    median = durations[len(durations) // 2]
+    print(f"{name}: min {durations[0] * 1000:.2f} ms, median {median * 1000:.2f} ms, max {durations[-1] * 1000:.2f} ms")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="script_panel", description="Script Panel tools that run without blender")
+    parser.add_argument("--config-dir", help="use this folder for the local config instead of the user config folder")
+    parser.add_argument("--metrics-dir", help="collect metrics while running and export them to this folder")
+
+    sub_parsers = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = sub_parsers.add_parser("scan", help="list every script found in the root dirs")
+    scan_parser.set_defaults(func=cmd_scan)
+
+    stats_parser = sub_parsers.add_parser("stats", help="print catalog statistics")
+    stats_parser.set_defaults(func=cmd_stats)
+
+    validate_parser = sub_parsers.add_parser("validate-config", help="check shared_config.json against the files on disk")
+    validate_parser.set_defaults(func=cmd_validate_config)
+
+    bench_parser = sub_parsers.add_parser("bench", help="time populate_scripts and search")
+    bench_parser.add_argument("--repeat", type=int, default=5)
+    bench_parser.add_argument("--query", default="a")
+    bench_parser.add_argument("--tags", nargs="+", help="also time filtering the search by these tags, e.g. department:rigging")
+    bench_parser.add_argument("--memory", action="store_true", help="also measure how much memory a scanned catalog takes")
+    bench_parser.set_defaults(func=cmd_bench)
+
+    validate_scripts_parser = sub_parsers.add_parser("validate-scripts", help="syntax check every script, using the validation cache")
+    validate_scripts_parser.add_argument("--workers", type=int, help="number of processes, defaults to the number of cores")
+    validate_scripts_parser.set_defaults(func=cmd_validate_scripts)
+
+    index_content_parser = sub_parsers.add_parser("index-content", help=f"build {script_content_index.k.cache_file_name} and check it against the scripts on disk")
+    index_content_parser.add_argument("--query", help="also search the index for this")
+    index_content_parser.set_defaults(func=cmd_index_content)
+
+    publish_parser = sub_parsers.add_parser("publish-manifest", help=f"write {catalog_manifest.k.manifest_name} into the root dirs")
+    publish_parser.set_defaults(func=cmd_publish_manifest)
+
+    verify_parser = sub_parsers.add_parser("verify-manifest", help="list what changed since the manifest was published")
+    verify_parser.set_defaults(func=cmd_verify_manifest)
+
+    shard_parser = sub_parsers.add_parser("shard-config", help="move the script configs of shared_config.json into per-folder shards")
+    shard_parser.set_defaults(func=cmd_shard_config)
+
+    stress_parser = sub_parsers.add_parser("stress-config", help="append to one shared config from many processes at once and check that no edit gets lost")
+    stress_parser.add_argument("--processes", type=int, default=8)
+    stress_parser.add_argument("--edits", type=int, default=200, help="edits per process")
+    stress_parser.add_argument("--dir", help="create the test config in this folder, e.g. on the network share the root dirs live on")
+    stress_parser.set_defaults(func=cmd_stress_config)
+
+    pack_parser = sub_parsers.add_parser("pack-bundle", help="pack a root dir into a zip bundle that can be used as a root dir")
+    pack_parser.add_argument("root_dir")
+    pack_parser.add_argument("bundle_path", help="output .zip")
+    pack_parser.set_defaults(func=cmd_pack_bundle)
+
+    publish_remote_parser = sub_parsers.add_parser("publish-remote", help=f"write {remote_catalog.k.manifest_name} so the root dirs can be served as http catalogs")
+    publish_remote_parser.set_defaults(func=cmd_publish_remote)
+
+    sync_remote_parser = sub_parsers.add_parser("sync-remote", help="sync an http catalog into its local cache folder")
+    sync_remote_parser.add_argument("url")
+    sync_remote_parser.add_argument("--cache-dir", help="sync into this folder instead of the one the addon uses")
+    sync_remote_parser.add_argument("--workers", type=int, default=remote_catalog.k.max_workers, help="parallel downloads")
+    sync_remote_parser.set_defaults(func=cmd_sync_remote)
+
+    check_remote_parser = sub_parsers.add_parser("check-remote", help="sync a root dir served by a local http server and check the 304, incremental and offline handling")
+    check_remote_parser.add_argument("root_dir", nargs="?", help="root dir to serve a copy of, a small generated one when left out")
+    check_remote_parser.add_argument("--workers", type=int, default=remote_catalog.k.max_workers, help="parallel downloads")
+    check_remote_parser.set_defaults(func=cmd_check_remote)
+
+    for sub_parser in (scan_parser, stats_parser, validate_parser, validate_scripts_parser, index_content_parser, bench_parser, publish_parser, verify_parser, shard_parser, publish_remote_parser):
+        sub_parser.add_argument("root_dirs", nargs="+", help="root dirs, same as in the addon preferences")
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.config_dir:
+        os.environ[k.config_dir_env_var] = args.config_dir
+
+    script_panel_metrics.registry.enabled = bool(args.metrics_dir)
+    result = args.func(args)
+
+    if args.metrics_dir:
+        for output_path in script_panel_metrics.registry.export(args.metrics_dir):
+            print(f"Wrote {output_path}")
+
+    return result
@@ -1,6 +1,44 @@
 import os
 
+
+class ScriptRecord(object):
+    def __init__(self, path, relative_dir="", config=None):
+        # .py file on disk that runs when the button is pressed
+        self.path = path
+
+        # folder to show the button in, with forward slashes. "" puts it at the top of the source
+        self.relative_dir = relative_dir
+
+        # same keys as a script config in shared_config.json, e.g. label, tooltip, icon_name
+        self.config = config or {}
+
+
+class ScriptSourceProvider(object):
+    """
+    Adds scripts that don't come from a root dir, e.g. from an asset database or generated tools.
+    Return instances from ScriptPanelExtension.get_script_source_providers().
+    """
+
+    # unique between providers, shown as the top folder of its scripts
+    name = "Scripts"
+
+    def get_version_token(self):
+        """
+        Any value that changes whenever iter_scripts() would yield something different, e.g. a database revision.
+        Scripts are only pulled again when it changes, None pulls on every refresh.
+        Called every few seconds from the main thread, so keep it cheap.
+        """
+        return None
+
+    def iter_scripts(self):
+        """Yield a ScriptRecord per script. Runs on a background thread and is consumed as it goes."""
+        return iter(())
+
+
 class ScriptPanelExtension(object):
 
     def get_default_root_paths(self):
         return [os.path.join(os.path.dirname(__file__), "example_dir")]
+
+    def get_script_source_providers(self):
+        return []
@@ -13,7 +13,14 @@ class ModuleConstants:
     extension_file_prefix = "script_panel_ext_"
 
 
+# sys.path is only searched once an extension is first asked for, not while blender starts
+extensions_imported = False
+
+
 def pop_extension_modules():
+    global extensions_imported
+    extensions_imported = False
+
     modules_to_pop = []
     for mod_key in sys.modules.keys():
         if mod_key.startswith(ModuleConstants.extension_file_prefix):
@@ -24,8 +31,10 @@ def pop_extension_modules():
 
 
 def import_extensions(refresh=False):
+    global extensions_imported
     if refresh:
         pop_extension_modules()
+    extensions_imported = True
 
     # look through sys.path for extension modules
     modules_to_import = list()
@@ -56,15 +65,14 @@ def import_extensions(refresh=False):
 
 
 def get_extension_cls() -> script_panel_extension_interface.ScriptPanelExtension:
+    if not extensions_imported:
+        try:
+            import_extensions()
+        except Exception as e:
+            traceback.print_exc()
 
     sub_classes = script_panel_extension_interface.ScriptPanelExtension.__subclasses__()
     if sub_classes:
         return sub_classes[0]()
     
     return script_panel_extension_interface.ScriptPanelExtension()
-
-
-try:
-    import_extensions()
-except Exception as e:
-    traceback.print_exc()
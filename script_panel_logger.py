@@ -1,8 +1,100 @@
+import os
+import sys
+import json
+import time
 import logging
+import collections
+import contextlib
+
+
+class Constants:
+    max_entries = 2000
+
+    # only the tail of what a single run printed ends up in the buffer
+    max_captured_lines = 200
+
+    # writes kept per stream while a script runs, older output is dropped
+    max_captured_chunks = 1000
+
+    dump_file_name = "script_panel_log.jsonl"
+
+k = Constants
+
+
+class LogEntry():
+    __slots__ = ("time", "level", "script_path", "duration", "message")
+
+    def __init__(self, time, level, message, script_path="", duration=None):
+        self.time = time
+        self.level = level
+        self.message = message
+        self.script_path = script_path
+        self.duration = duration
+
+    def to_dict(self):
+        return {
+            "time": self.time,
+            "level": self.level,
+            "script_path": self.script_path,
+            "duration": self.duration,
+            "message": self.message,
+        }
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the most recent records in memory, pass script_path / duration through extra= to attach them"""
+    def __init__(self, max_entries=k.max_entries):
+        super().__init__()
+        self.entries = collections.deque(maxlen=max_entries)
+
+    def emit(self, record):
+        message = record.getMessage()
+        if record.exc_info:
+            message += "\n" + logging.Formatter().formatException(record.exc_info)
+
+        self.add_entry(
+            record.levelname,
+            message,
+            getattr(record, "script_path", ""),
+            getattr(record, "duration", None),
+            record.created,
+            )
+
+    def add_entry(self, level, message, script_path="", duration=None, entry_time=None):
+        # deque.append is atomic, no lock needed for the background threads
+        self.entries.append(LogEntry(entry_time or time.time(), level, message, script_path, duration))
+
+    def get_recent_entries(self, count=None):
+        entries = list(self.entries)
+        return entries[-count:] if count else entries
+
+    def clear(self):
+        self.entries.clear()
+
+    def dump(self, output_path):
+        """One json object per line, oldest first"""
+        with open(output_path, "w", encoding="utf-8") as fp:
+            for entry in self.get_recent_entries():
+                fp.write(json.dumps(entry.to_dict()) + "\n")
+        return output_path
+
 
 LOGGER_CLS = logging.getLogger("script_panel")
 LOGGER_CLS.setLevel(logging.INFO)
 
+# reloading the addon runs this module again, don't stack up handlers on the same logger
+for old_handler in [handler for handler in LOGGER_CLS.handlers if getattr(handler, "is_script_panel_handler", False)]:
+    LOGGER_CLS.removeHandler(old_handler)
+
+buffer_handler = RingBufferHandler()
+LOGGER_CLS.addHandler(buffer_handler)
+
+# the buffer handler stops python from falling back to printing warnings, keep them in the console
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.WARNING)
+buffer_handler.is_script_panel_handler = console_handler.is_script_panel_handler = True
+LOGGER_CLS.addHandler(console_handler)
+
 
 def get_logger():
     return LOGGER_CLS
@@ -14,3 +106,50 @@ def get_log_level_options():
         logging.getLevelName(logging.INFO): logging.INFO,
         logging.getLevelName(logging.WARNING): logging.WARNING,
     }
+
+
+class _TeeStream():
+    """
+    Passes everything on to the real stream and keeps the last written chunks around.
+    write() is called for every print, so it only appends, splitting into lines happens once the script is done.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self.chunks = collections.deque(maxlen=k.max_captured_chunks)
+        self._append = self.chunks.append
+        self._write = stream.write if stream is not None else len
+
+    def write(self, text):
+        self._append(text)
+        return self._write(text)
+
+    def flush(self):
+        if self.stream is not None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        # encoding, isatty, fileno etc. of the real stream
+        return getattr(self.stream, name)
+
+    def get_lines(self):
+        return "".join(self.chunks).splitlines()[-k.max_captured_lines:]
+
+
+@contextlib.contextmanager
+def capture_output(script_path):
+    """Copy what the script prints to stdout / stderr into the log buffer, it still shows up in the console as well"""
+    stdout_tee = _TeeStream(sys.stdout)
+    stderr_tee = _TeeStream(sys.stderr)
+
+    try:
+        with contextlib.redirect_stdout(stdout_tee), contextlib.redirect_stderr(stderr_tee):
+            yield
+    finally:
+        for level, tee in (("STDOUT", stdout_tee), ("STDERR", stderr_tee)):
+            for line in tee.get_lines():
+                buffer_handler.add_entry(level, line, script_path)
+
+
+def dump_log(output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    return buffer_handler.dump(os.path.join(output_dir, k.dump_file_name))
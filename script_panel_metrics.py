@@ -0,0 +1,177 @@
+"""
+Counters, gauges and histograms for scan, draw, search and execution performance.
+
+Disabled by default, in which case every call returns straight away. Snapshots can be exported
+as json or in the Prometheus text format, so they can be collected from each workstation.
+"""
+import os
+import json
+import time
+import bisect
+import threading
+import contextlib
+
+
+class Constants:
+    prefix = "script_panel_"
+    json_file_name = "metrics.json"
+    prometheus_file_name = "metrics.prom"
+
+    # seconds
+    default_buckets = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+k = Constants
+
+
+class Counter():
+    kind = "counter"
+
+    def __init__(self, name, description=""):
+        self.name = name
+        self.description = description
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def to_dict(self):
+        return {"value": self.value}
+
+    def to_prometheus_lines(self, full_name):
+        return [f"{full_name} {self.value}"]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value):
+        self.value = value
+
+
+class Histogram():
+    kind = "histogram"
+
+    def __init__(self, name, description="", buckets=k.default_buckets):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(zip([str(bucket) for bucket in self.buckets] + ["+Inf"], self.bucket_counts)),
+        }
+
+    def to_prometheus_lines(self, full_name):
+        lines = []
+        cumulative_count = 0
+        for bucket, bucket_count in zip([str(bucket) for bucket in self.buckets] + ["+Inf"], self.bucket_counts):
+            cumulative_count += bucket_count
+            lines.append(f'{full_name}_bucket{{le="{bucket}"}} {cumulative_count}')
+        lines.append(f"{full_name}_sum {self.sum}")
+        lines.append(f"{full_name}_count {self.count}")
+        return lines
+
+
+class MetricsRegistry():
+    def __init__(self):
+        self.enabled = False
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, metric_cls, name, description):
+        metric = self.metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self.metrics.setdefault(name, metric_cls(name, description))
+        return metric
+
+    def counter(self, name, description="") -> Counter:
+        return self._get(Counter, name, description)
+
+    def gauge(self, name, description="") -> Gauge:
+        return self._get(Gauge, name, description)
+
+    def histogram(self, name, description="") -> Histogram:
+        return self._get(Histogram, name, description)
+
+    def reset(self):
+        with self._lock:
+            self.metrics = {}
+
+    def to_dict(self):
+        return {
+            "time": time.time(),
+            "metrics": {
+                name: dict(kind=metric.kind, **metric.to_dict()) for name, metric in sorted(self.metrics.items())
+                },
+        }
+
+    def to_prometheus_text(self):
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            full_name = k.prefix + name
+            if metric.description:
+                lines.append(f"# HELP {full_name} {metric.description}")
+            lines.append(f"# TYPE {full_name} {metric.kind}")
+            lines.extend(metric.to_prometheus_lines(full_name))
+        return "\n".join(lines) + "\n"
+
+    def export(self, output_dir):
+        """Writes the json and prometheus snapshots, returns their paths"""
+        os.makedirs(output_dir, exist_ok=True)
+
+        json_path = os.path.join(output_dir, k.json_file_name)
+        with open(json_path, "w") as fp:
+            json.dump(self.to_dict(), fp, indent=2)
+
+        prometheus_path = os.path.join(output_dir, k.prometheus_file_name)
+        with open(prometheus_path, "w") as fp:
+            fp.write(self.to_prometheus_text())
+
+        return json_path, prometheus_path
+
+
+registry = MetricsRegistry()
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+def inc(name, amount=1, description=""):
+    if registry.enabled:
+        registry.counter(name, description).inc(amount)
+
+
+def set_gauge(name, value, description=""):
+    if registry.enabled:
+        registry.gauge(name, description).set(value)
+
+
+def observe(name, value, description=""):
+    if registry.enabled:
+        registry.histogram(name, description).observe(value)
+
+
+@contextlib.contextmanager
+def _timer(name, description):
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.histogram(name, description).observe(time.perf_counter() - start_time)
+
+
+def timed(name, description=""):
+    """Context manager that records the duration in a histogram, does nothing while disabled"""
+    if not registry.enabled:
+        return _NULL_TIMER
+    return _timer(name, description)
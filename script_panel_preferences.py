@@ -2,11 +2,27 @@ import os
 import bpy
 
 from . import script_handler
+from . import remote_catalog
+from . import script_panel_metrics
 from . import script_panel_extension_system
 
 
 class ScriptPanel_RootPath(bpy.types.PropertyGroup):
+    root_type: bpy.props.EnumProperty(
+        items=[
+            ("DIR", "Folder", "Folder on disk or on a mounted share", "FILE_FOLDER", 0),
+            ("URL", "Catalog URL", "HTTP catalog, synced into the local config folder and usable offline from the last sync", "URL", 1),
+            ],
+        default="DIR",
+        )
     dir_path: bpy.props.StringProperty(subtype="DIR_PATH")
+    url: bpy.props.StringProperty(name="Catalog URL")
+
+    def get_path(self):
+        """Folder that gets scanned, the local cache folder for a catalog url"""
+        if self.root_type == "URL":
+            return remote_catalog.get_cache_dir(script_handler.get_local_config_dir(), self.url)
+        return self.dir_path
 
 
 class ScriptPanel_AddDirEntry(bpy.types.Operator):
@@ -78,6 +94,59 @@ class ScriptPanel_Preferences(bpy.types.AddonPreferences):
         min=1,
         )
 
+    show_frequently_used: bpy.props.BoolProperty(
+        name="Show Frequently Used",
+        description="Show the scripts you've been running the most at the top of the panel",
+        )
+    
+    frequently_used_count: bpy.props.IntProperty(
+        name="Frequently Used Count",
+        default=5,
+        description="How many frequently used scripts to show",
+        min=1,
+        )
+
+    validate_scripts: bpy.props.BoolProperty(
+        name="Check Scripts For Errors",
+        default=True,
+        description="After refreshing, compile every script in the background and mark the ones with syntax errors",
+        )
+
+    reload_helper_modules: bpy.props.BoolProperty(
+        name="Reload Edited Helper Modules",
+        default=True,
+        description="Before running a script, reload the modules it imports from the root dirs if their files changed since the last run",
+        )
+
+    profile_imports: bpy.props.BoolProperty(
+        name="Profile Script Imports",
+        description="Record which modules each script imports for the first time and how long they take.\nThe report shows up in the button edit box",
+        )
+
+    search_script_content: bpy.props.BoolProperty(
+        name="Search Script Content",
+        description="Also match the names, comments and docstrings inside the scripts when searching.\nThe index is built in the background and cached in the local config folder",
+        update=lambda self, context: update_content_search(self),
+        )
+
+    use_catalog_database: bpy.props.BoolProperty(
+        name="Use Catalog Database",
+        description="Keep an SQLite copy of the catalog in the local config folder and search it instead of looping over every script.\nHelps with very large script collections",
+        update=lambda self, context: script_handler.instance.set_database_enabled(self.use_catalog_database),
+        )
+
+    share_catalog: bpy.props.BoolProperty(
+        name="Share Catalog Between Instances",
+        description="Let the blender instances on this machine share one scan of the root dirs through a cache in the local config folder.\nInstances pick up each other's refreshes",
+        update=lambda self, context: script_handler.instance.set_shared_catalog_enabled(self.share_catalog),
+        )
+
+    collect_metrics: bpy.props.BoolProperty(
+        name="Collect Metrics",
+        description="Record timings and cache hit rates of scanning, drawing, searching and running scripts.\nCan be exported as json or for Prometheus",
+        update=lambda self, context: setattr(script_panel_metrics.registry, "enabled", self.collect_metrics),
+        )
+
     def draw(self, context):
         layout = self.layout
         draw_preferences(layout)
@@ -86,9 +155,16 @@ class ScriptPanel_Preferences(bpy.types.AddonPreferences):
         root_path : ScriptPanel_RootPath
         output_paths = []
         for root_path in self.root_paths:
-            output_paths.append(root_path.dir_path)
+            if root_path.root_type == "URL" and not root_path.url:
+                continue
+            output_paths.append(root_path.get_path())
         return output_paths
 
+    def get_remote_roots(self):
+        """cache folder: catalog url"""
+        root_path : ScriptPanel_RootPath
+        return {root_path.get_path(): root_path.url for root_path in self.root_paths if root_path.root_type == "URL" and root_path.url}
+
 
 def draw_preferences(layout):
     prefs = get_preferences()
@@ -108,6 +184,13 @@ def draw_preferences(layout):
             horizontal_row.prop(prefs, "favorites_row_threshold", expand=True)
         favorites_body.prop(prefs, "favorites_show_label")
     
+    frequent_header, frequent_body = layout.panel("FrequentlyUsed", default_closed=True)
+    frequent_header.prop(prefs, "show_frequently_used", text="")
+    frequent_header.label(text="Frequently Used")
+    if frequent_body:
+        frequent_body.enabled = prefs.show_frequently_used
+        frequent_body.prop(prefs, "frequently_used_count")
+
     root_paths_header, root_paths_body = layout.panel("RootPaths", default_closed=True)
     root_paths_header.label(text="Root Dirs")
 
@@ -119,7 +202,8 @@ def draw_preferences(layout):
         root_path : ScriptPanel_RootPath
         for i, root_path in enumerate(prefs.root_paths):
             row = root_paths_body.row()
-            row.prop(root_path, "dir_path", text="")
+            row.prop(root_path, "root_type", text="", icon_only=True)
+            row.prop(root_path, "url" if root_path.root_type == "URL" else "dir_path", text="")
             remove_op = row.operator(ScriptPanel_RemoveDirEntry.bl_idname, icon="X", text="")
             remove_op.idx = i
 
@@ -130,6 +214,29 @@ def draw_preferences(layout):
         editing_body.label(text="External Code Editor")
         editing_body.prop(prefs, "external_editor_path", text="")
 
+    advanced_header, advanced_body = layout.panel("AdvancedPrefs", default_closed=True)
+    advanced_header.label(text="Advanced")
+
+    if advanced_body:
+        advanced_body.prop(prefs, "validate_scripts")
+        advanced_body.prop(prefs, "reload_helper_modules")
+        advanced_body.prop(prefs, "profile_imports")
+        advanced_body.prop(prefs, "search_script_content")
+        advanced_body.prop(prefs, "use_catalog_database")
+        advanced_body.prop(prefs, "share_catalog")
+
+        metrics_row = advanced_body.row()
+        metrics_row.prop(prefs, "collect_metrics")
+        export_row = metrics_row.row()
+        export_row.enabled = prefs.collect_metrics
+        export_row.operator("scriptpanel.export_metrics", icon="EXPORT")
+
+
+def update_content_search(prefs):
+    script_handler.instance.search_content = prefs.search_script_content
+    if prefs.search_script_content:
+        script_handler.instance.start_background_content_indexing()
+
 
 def get_preferences() -> ScriptPanel_Preferences: 
     return bpy.context.preferences.addons[__package__].preferences
@@ -0,0 +1,114 @@
+"""
+Syntax checks for every script in the catalog, without executing any of them.
+
+Results are cached by path + mtime + size in the local config folder, so only new or edited
+scripts get compiled again. Large batches are spread over all cores with a process pool.
+"""
+import os
+import json
+
+from . import file_utils
+from . import script_panel_logger
+from . import script_panel_metrics
+
+log = script_panel_logger.get_logger()
+
+
+class Constants:
+    cache_file_name = "validation_cache.json"
+
+    # below this it's quicker to compile in process than to start the pool
+    min_pool_batch_size = 200
+
+k = Constants
+
+
+def get_cache_path(config_dir):
+    return os.path.join(config_dir, k.cache_file_name)
+
+
+def check_syntax(script_path):
+    """Error message if the script can't be compiled, otherwise None"""
+    try:
+        with open(script_path, "rb") as fp:
+            source = fp.read()
+        compile(source, script_path, "exec", dont_inherit=True)
+    except SyntaxError as e:
+        return f"{e.msg} (line {e.lineno})"
+    except (OSError, ValueError) as e:
+        return str(e)
+    return None
+
+
+def check_syntax_batch(script_paths):
+    return [(script_path, check_syntax(script_path)) for script_path in script_paths]
+
+
+def load_cache(cache_path):
+    if not os.path.exists(cache_path):
+        return {}
+
+    try:
+        with open(cache_path, "r") as fp:
+            return json.load(fp)
+    except ValueError:
+        return {}
+
+
+def save_cache(cache_path, cache):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    file_utils.write_json(cache_path, cache)
+
+
+def validate_scripts(script_paths, cache_path=None, max_workers=None):
+    """Returns {script_path: error message} for every script that fails to compile"""
+    cache = load_cache(cache_path) if cache_path else {}
+
+    new_cache = {}
+    stale_paths = []
+    for script_path in script_paths:
+        file_stat = file_utils.get_stat_key(script_path)
+        cached = cache.get(script_path)
+        if cached and cached[0] == file_stat:
+            new_cache[script_path] = cached
+        else:
+            new_cache[script_path] = [file_stat, None]
+            stale_paths.append(script_path)
+
+    script_panel_metrics.inc("validation_cache_hits", len(script_paths) - len(stale_paths))
+    script_panel_metrics.inc("validation_cache_misses", len(stale_paths))
+
+    for script_path, error in compile_scripts(stale_paths, max_workers):
+        new_cache[script_path][1] = error
+
+    if cache_path and (stale_paths or len(new_cache) != len(cache)):
+        save_cache(cache_path, new_cache)
+
+    return {script_path: error for script_path, (_, error) in new_cache.items() if error}
+
+
+def compile_scripts(script_paths, max_workers=None):
+    if len(script_paths) < k.min_pool_batch_size:
+        return check_syntax_batch(script_paths)
+
+    max_workers = max_workers or os.cpu_count() or 1
+
+    # a few chunks per worker so a slow file share doesn't leave cores idle at the end
+    chunk_size = max(1, len(script_paths) // (max_workers * 4))
+    chunks = [script_paths[i:i + chunk_size] for i in range(0, len(script_paths), chunk_size)]
+
+    import multiprocessing
+    import concurrent.futures
+
+    results = []
+    try:
+        # spawn, forking a running blender isn't safe
+        mp_context = multiprocessing.get_context("spawn")
+        with concurrent.futures.ProcessPoolExecutor(max_workers, mp_context=mp_context) as executor:
+            for chunk_results in executor.map(check_syntax_batch, chunks):
+                results.extend(chunk_results)
+    except (OSError, concurrent.futures.process.BrokenProcessPool) as e:
+        log.warning(f"Script validation couldn't start worker processes, checking in process instead: {e}")
+        return check_syntax_batch(script_paths)
+
+    return results
@@ -0,0 +1,126 @@
+"""
+Catalog shared between the blender instances running on one workstation.
+
+The first instance that needs a catalog scans the root dirs and pickles the result into the local config
+folder, under the same advisory lock the config journal uses. Instances starting while that scan runs
+wait for the lock and load the result instead of scanning themselves. Other instances notice a newly
+written catalog with a single stat of the cache file, see has_changed().
+
+Config files are checked every time a cached catalog is used. The scanned folders are only stat'ed again
+once the cache is older than a few minutes. Whenever the cache can't be used, each instance simply
+scans on its own like before.
+"""
+import os
+import time
+import hashlib
+
+from . import file_utils
+from . import config_journal
+from . import script_panel_logger
+from . import script_panel_metrics
+
+log = script_panel_logger.get_logger()
+
+
+class Constants:
+    file_prefix = "shared_catalog_"
+    version = 1
+
+    # seconds, a catalog written this recently by another instance is used without stat'ing its folders
+    trusted_age = 300
+
+k = Constants
+
+
+class SharedCatalogCache():
+    def __init__(self, config_dir, format_key=()):
+        self.config_dir = config_dir
+
+        # changes whenever the pickled classes change, so an older addon version never loads a newer catalog
+        self.format_key = (k.version,) + tuple(format_key)
+
+        # cache path: stat of the cache when this instance last read or wrote it
+        self._seen_stats = {}
+
+    def get_cache_path(self, root_dirs):
+        # one cache per set of root dirs, instances with different preferences don't fight over a file
+        root_dirs_hash = hashlib.sha1("\n".join(root_dirs).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.config_dir, f"{k.file_prefix}{root_dirs_hash}.pickle")
+
+    def get_catalog(self, root_dirs, build_func, config_paths=(), force_scan=False):
+        """
+        The cached catalog when it's still valid, otherwise build_func(root_dirs) which then gets cached.
+        config_paths are the config files the catalog was built from.
+        """
+        root_dirs = list(root_dirs)
+        cache_path = self.get_cache_path(root_dirs)
+
+        try:
+            with config_journal.locked(cache_path):
+                catalog = None if force_scan else self._load(cache_path, root_dirs)
+                if catalog is not None:
+                    script_panel_metrics.inc("shared_catalog_hits", description="catalogs loaded from another instance instead of scanning")
+                    return catalog
+
+                catalog = build_func(root_dirs)
+                self._save(cache_path, root_dirs, catalog, config_paths)
+                return catalog
+
+        except OSError as e:
+            log.warning(f"Shared catalog unavailable, scanning without it: {e}")
+            return build_func(root_dirs)
+
+    def has_changed(self, root_dirs):
+        """True when another instance wrote a catalog for these root dirs since this one last read or wrote it"""
+        cache_path = self.get_cache_path(list(root_dirs))
+        stat_key = file_utils.get_stat_key(cache_path)
+        return stat_key is not None and stat_key != self._seen_stats.get(cache_path)
+
+    def _load(self, cache_path, root_dirs):
+        import pickle
+
+        stat_key = file_utils.get_stat_key(cache_path)
+        if stat_key is None:
+            return None
+
+        try:
+            with open(cache_path, "rb") as fp:
+                cached = pickle.load(fp)
+        except Exception as e:
+            log.warning(f"Ignoring broken shared catalog {cache_path}: {e}")
+            return None
+
+        self._seen_stats[cache_path] = stat_key
+
+        if cached.get("format_key") != self.format_key or cached.get("root_dirs") != root_dirs:
+            return None
+
+        if any(file_utils.get_mtime(path) != mtime for path, mtime in cached["config_mtimes"].items()):
+            return None
+
+        if time.time() - cached["time"] > k.trusted_age:
+            if any(file_utils.get_mtime(path) != mtime for path, mtime in cached["dir_mtimes"].items()):
+                return None
+
+        return cached["catalog"]
+
+    def _save(self, cache_path, root_dirs, catalog, config_paths):
+        cached = {
+            "format_key": self.format_key,
+            "root_dirs": root_dirs,
+            "time": time.time(),
+            "config_mtimes": {path: file_utils.get_mtime(path) for path in config_paths},
+            "dir_mtimes": catalog.dir_mtimes,
+            "catalog": catalog,
+        }
+
+        import pickle
+
+        try:
+            with file_utils.atomic_write(cache_path, "wb") as fp:
+                pickle.dump(cached, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        except (OSError, pickle.PicklingError) as e:
+            log.warning(f"Failed to write shared catalog {cache_path}: {e}")
+            return
+
+        self._seen_stats[cache_path] = file_utils.get_stat_key(cache_path)
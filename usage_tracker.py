@@ -0,0 +1,128 @@
+"""
+Counts how often scripts get run, with older runs counting for less and less over time.
+
+Runs are only recorded in memory, writing to disk is left to flush() which gets called on a timer.
+Every blender instance adds its own runs to what's on disk, so instances running side by side don't lose each other's counts.
+"""
+import os
+import json
+import math
+import time
+import heapq
+
+from . import file_utils
+from . import config_journal
+from . import script_panel_logger
+
+log = script_panel_logger.get_logger()
+
+
+class Constants:
+    file_name = "usage_stats.json"
+
+    # a run from two weeks ago counts half as much as a run today
+    half_life_seconds = 14 * 24 * 60 * 60
+
+k = Constants
+
+
+def get_usage_path(config_dir):
+    return os.path.join(config_dir, k.file_name)
+
+
+class UsageTracker():
+    def __init__(self):
+        # config_key: (score, time of last run), the score is only decayed when the script runs again
+        self.scores = {}
+
+        # config_key: (score, time of last run) of only the runs since the last flush, added to what's on disk then
+        self.pending_scores = {}
+        self.is_loaded = False
+
+        # bumped whenever scores change, for caching anything sorted by them
+        self.version = 0
+
+        # the panel asks for this on every redraw
+        self._most_used_cache = None
+
+    def load(self, usage_path):
+        self.is_loaded = True
+        self.scores.update(read_scores(usage_path))
+        self._on_scores_changed()
+
+    def record(self, config_key, now=None):
+        now = time.time() if now is None else now
+
+        score, last_used = self.scores.get(config_key, (0.0, now))
+        self.scores[config_key] = (get_decayed_score(score, last_used, now) + 1, now)
+        self.pending_scores[config_key] = add_scores(self.pending_scores.get(config_key), (1.0, now))
+        self._on_scores_changed()
+
+    def _on_scores_changed(self):
+        self._most_used_cache = None
+        self.version += 1
+
+    def get_score(self, config_key, now=None):
+        if config_key not in self.scores:
+            return 0.0
+        score, last_used = self.scores[config_key]
+        return get_decayed_score(score, last_used, time.time() if now is None else now)
+
+    def get_rank_key(self, config_key):
+        """
+        Sorts the same way as get_score but doesn't depend on the current time,
+        since every score decays by the same factor.
+        """
+        if config_key not in self.scores:
+            return -math.inf
+        score, last_used = self.scores[config_key]
+        return math.log2(score) + last_used / k.half_life_seconds
+
+    def get_most_used(self, count):
+        if self._most_used_cache is None or self._most_used_cache[0] != count:
+            self._most_used_cache = (count, heapq.nlargest(count, self.scores.keys(), key=self.get_rank_key))
+        return self._most_used_cache[1]
+
+    def flush(self, usage_path):
+        if not self.pending_scores:
+            return False
+
+        os.makedirs(os.path.dirname(usage_path), exist_ok=True)
+        with config_journal.locked(usage_path):
+            # other instances may have flushed since this one loaded, so only the runs since the last flush get added
+            scores = read_scores(usage_path)
+            for config_key, pending_score in self.pending_scores.items():
+                scores[config_key] = add_scores(scores.get(config_key), pending_score)
+
+            file_utils.write_json(usage_path, {"scripts": scores})
+
+        self.scores = scores
+        self.pending_scores = {}
+        self._on_scores_changed()
+        return True
+
+
+def read_scores(usage_path):
+    if not os.path.exists(usage_path):
+        return {}
+
+    try:
+        with open(usage_path, "r") as fp:
+            usage_data = json.load(fp)
+    except ValueError:
+        log.warning(f"Ignoring broken usage stats: {usage_path}")
+        return {}
+
+    return {config_key: (score, last_used) for config_key, (score, last_used) in usage_data.get("scripts", {}).items()}
+
+
+def get_decayed_score(score, last_used, now):
+    return score * 0.5 ** ((now - last_used) / k.half_life_seconds)
+
+
+def add_scores(score_a, score_b):
+    """Sum of two (score, time of last run), decayed to the later of the two times. score_a can be None."""
+    if score_a is None:
+        return score_b
+    last_used = max(score_a[1], score_b[1])
+    return (get_decayed_score(score_a[0], score_a[1], last_used) + get_decayed_score(score_b[0], score_b[1], last_used), last_used)